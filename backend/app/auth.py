@@ -1,17 +1,25 @@
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.doctor import Doctor
-from app.models.patient import Patient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.core.cache import TTLCache
+from app.core.redis import redis_client
+from app.core.logging_config import bind_user
 from app.schemas.patient import PatientResponse
 from app.schemas.doctor import DoctorResponse
-from app.utils.helper import verify_password
+from app.utils.helper import (
+    verify_password_async,
+    get_doctor_by_id,
+    get_doctor_by_email,
+    get_patient_by_id,
+    get_patient_by_email,
+)
 import os
 from dotenv import load_dotenv
 
@@ -24,9 +32,13 @@ SECRET_KEY = os.getenv("SECRET_KEY","healthcare123")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
+# Principal / token cache settings
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))  # Seconds a resolved user stays cached
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_REDIS = os.getenv("PRINCIPAL_CACHE_REDIS", "false").lower() in ("1", "true", "yes")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -53,6 +65,24 @@ class UserType:
     PATIENT = "patient"
 
 
+# Decoded JWT payloads, keyed by the raw token (each entry expires with its token)
+token_cache = TTLCache("jwt_payload", maxsize=TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# Resolved doctors / patients as response schemas, keyed by user id
+principal_caches = {
+    UserType.DOCTOR: TTLCache("principal_doctor", maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL),
+    UserType.PATIENT: TTLCache("principal_patient", maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL),
+}
+principal_schemas = {
+    UserType.DOCTOR: DoctorResponse,
+    UserType.PATIENT: PatientResponse,
+}
+principal_loaders = {
+    UserType.DOCTOR: get_doctor_by_id,
+    UserType.PATIENT: get_patient_by_id,
+}
+
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -61,33 +91,86 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def authenticate_user(db: Session, email: str, password: str, user_type: str) -> Optional[dict]:
+async def authenticate_user(db: AsyncSession, email: str, password: str, user_type: str) -> Optional[dict]:
     """
     Authenticate a doctor or patient by email and password.
     """
     if user_type == UserType.DOCTOR:
-        user = db.query(Doctor).filter(Doctor.email == email).first()
+        user = await get_doctor_by_email(db, email)
     elif user_type == UserType.PATIENT:
-        user = db.query(Patient).filter(Patient.email == email).first()
+        user = await get_patient_by_email(db, email)
     else:
-        print("def authenticate_user:: User authentication by user or passwor FAILED")
+        logger.debug("Authentication failed: unknown user type %s", user_type)
         return None
 
-    if not user or not verify_password(password, user.password):
-        print("Failed: returned None: User not authenticated, or password not verified")
+    if not user or not await verify_password_async(password, user.password):
+        logger.debug("Authentication failed for %s %s", user_type, email)
         return None
 
-    print('SUCCESS: (id": user.id, "email": user.email, "user_type": user_type) Returned')
+    logger.debug("Authenticated %s ID=%s", user_type, user.id)
     return {"id": user.id, "email": user.email, "user_type": user_type}
 
 
 
 
 
+def principal_cache_key(user_type: str, user_id: int) -> str:
+    return f"principal:{user_type}:{user_id}"
+
+
+async def resolve_principal(db: AsyncSession, user_type: str, user_id: int):
+    """
+    Return the doctor / patient for a token as its response schema, served from
+    the in-process cache, then Redis (if enabled), then the database.
+    """
+    cache = principal_caches[user_type]
+    schema = principal_schemas[user_type]
+
+    principal = cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    if PRINCIPAL_CACHE_REDIS:
+        try:
+            cached = await redis_client.get(principal_cache_key(user_type, user_id))
+            if cached:
+                principal = schema.model_validate_json(cached)
+                cache.set(user_id, principal)
+                return principal
+        except Exception as e:
+            logger.warning(f"Principal cache read from Redis failed: {e}")
+
+    user = await principal_loaders[user_type](db, user_id)
+    if not user:
+        return None
+    principal = schema.model_validate(user)
+    cache.set(user_id, principal)
+
+    if PRINCIPAL_CACHE_REDIS:
+        try:
+            await redis_client.set(principal_cache_key(user_type, user_id), principal.model_dump_json(), ex=int(PRINCIPAL_CACHE_TTL))
+        except Exception as e:
+            logger.warning(f"Principal cache write to Redis failed: {e}")
+    return principal
+
+
+async def invalidate_principal(user_type: str, user_id: int) -> None:
+    """
+    Drop a cached doctor / patient after it changes. Other workers' in-process
+    copies expire within PRINCIPAL_CACHE_TTL.
+    """
+    principal_caches[user_type].delete(user_id)
+    if PRINCIPAL_CACHE_REDIS:
+        try:
+            await redis_client.delete(principal_cache_key(user_type, user_id))
+        except Exception as e:
+            logger.warning(f"Principal cache invalidation in Redis failed: {e}")
+
+
 # Doctor-specific dependency
 async def get_current_doctor(
     token: str = Depends(oauth2_doctor_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> DoctorResponse:
     payload = decode_token(token)
     user_type = payload.get("user_type")
@@ -96,16 +179,16 @@ async def get_current_doctor(
     if user_type != UserType.DOCTOR or not user_id:
         raise HTTPException(status_code=403, detail="Not authorized as a doctor")
     
-    doctor = db.query(Doctor).filter(Doctor.id == user_id).first()
+    doctor = await resolve_principal(db, UserType.DOCTOR, int(user_id))
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
-    
+    bind_user(UserType.DOCTOR, doctor.id)
     return doctor
 
 # Patient-specific dependency
 async def get_current_patient(
     token: str = Depends(oauth2_patient_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> PatientResponse:
     payload = decode_token(token)
     user_type = payload.get("user_type")
@@ -114,10 +197,10 @@ async def get_current_patient(
     if user_type != UserType.PATIENT or not user_id:
         raise HTTPException(status_code=403, detail="Not authorized as a patient")
     
-    patient = db.query(Patient).filter(Patient.id == user_id).first()
+    patient = await resolve_principal(db, UserType.PATIENT, int(user_id))
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
-    
+    bind_user(UserType.PATIENT, patient.id)
     return patient
 
 # Helper to decode token
@@ -127,8 +210,15 @@ def decode_token(token: str) -> dict:
         detail="Invalid credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
-        raise credentials_exception
\ No newline at end of file
+        raise credentials_exception
+    # Never serve a cached payload past the token's own expiry
+    remaining = payload.get("exp", 0) - time.time()
+    if remaining > 0:
+        token_cache.set(token, payload, ttl=remaining)
+    return payload
\ No newline at end of file
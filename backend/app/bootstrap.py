@@ -0,0 +1,64 @@
+"""
+One-shot database bootstrap: run it once per deploy, before starting the workers.
+
+    python -m app.bootstrap                    # migrate to head, then seed
+    python -m app.bootstrap --skip-migrations  # seed only
+    python -m app.bootstrap --check            # only report the schema version (exit 1 if behind)
+
+Migrations run through Alembic, specializations are seeded with a single bulk
+upsert, and the resulting schema version is verified. The API itself does no
+DDL or seeding at startup, it only checks the schema version.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from alembic import command
+
+from app.core.logging_config import setup_logging
+from app.core.schema import alembic_config, current_revision, head_revision
+from app.database import async_engine
+from app.populate_db.specializations_table import insert_specializations
+
+
+def schema_revision() -> str:
+    async def read():
+        try:
+            return await current_revision(async_engine)
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(read())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skip-migrations", action="store_true", help="don't run `alembic upgrade head`")
+    parser.add_argument("--check", action="store_true", help="only compare the database with the migration head")
+    args = parser.parse_args()
+    setup_logging()
+
+    head = head_revision()
+    if args.check:
+        current = schema_revision()
+        print(f"Database schema at {current}, head is {head}")
+        sys.exit(0 if current == head else 1)
+
+    started = time.perf_counter()
+    if not args.skip_migrations:
+        command.upgrade(alembic_config(), "head")
+        print(f"Migrated to {head} ({time.perf_counter() - started:.2f}s)")
+
+    seeded = time.perf_counter()
+    insert_specializations()
+    print(f"Seeded specializations ({time.perf_counter() - seeded:.2f}s)")
+
+    current = schema_revision()
+    if current != head:
+        print(f"Database schema is at {current}, expected {head}")
+        sys.exit(1)
+    print(f"Bootstrap complete at {current} ({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Circuit breaker for a remote dependency.
+
+After `failure_threshold` consecutive failures the breaker opens and calls fail
+at once with `open_error` instead of waiting on timeouts. After `reset_timeout`
+seconds it lets a single probe call through (half-open); success closes it,
+failure opens it again.
+"""
+import logging
+import time
+from typing import Optional
+
+from app.core.metrics import CIRCUIT_BREAKER_REJECTED, CIRCUIT_BREAKER_STATE, CIRCUIT_BREAKER_TRANSITIONS
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the dependency while the breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        failure_types: tuple = (Exception,),
+        open_error: type = CircuitOpenError,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_types = failure_types
+        self.open_error = open_error
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._probing = False
+        CIRCUIT_BREAKER_STATE.labels(name).set(0)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        log = logger.info if state == CLOSED else logger.warning
+        log(f"Circuit breaker {self.name}: {self.state} -> {state}" + (f" ({self.last_error})" if state == OPEN else ""))
+        self.state = state
+        CIRCUIT_BREAKER_STATE.labels(self.name).set(STATE_VALUES[state])
+        CIRCUIT_BREAKER_TRANSITIONS.labels(self.name, state).inc()
+
+    def before_call(self) -> None:
+        """Raise open_error unless a call may go through now."""
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        if self.state == OPEN or (self.state == HALF_OPEN and self._probing):
+            CIRCUIT_BREAKER_REJECTED.labels(self.name).inc()
+            raise self.open_error(f"{self.name} circuit is open: {self.last_error}")
+        if self.state == HALF_OPEN:
+            self._probing = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probing = False
+        self._transition(CLOSED)
+
+    def record_failure(self, error: BaseException) -> None:
+        self.failures += 1
+        self.last_error = str(error) or type(error).__name__
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._transition(OPEN)
+
+    async def call(self, func, *args, **kwargs):
+        """Await func(*args, **kwargs) through the breaker."""
+        self.before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except self.failure_types as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            # Not the dependency's fault (e.g. a script error or a cancelled request)
+            self._probing = False
+            raise
+        self.record_success()
+        return result
+
+    def status(self) -> dict:
+        """Current state, for the health endpoint."""
+        status = {"state": self.state, "consecutive_failures": self.failures}
+        if self.state != CLOSED:
+            status["last_error"] = self.last_error
+            status["retry_in_seconds"] = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+        return status
+
+
+def register_circuit_breaker(client, breaker: CircuitBreaker) -> None:
+    """
+    Send every command of an asyncio Redis client, including scripts and pipelines, through
+    the breaker. Like register_redis_metrics it wraps the instance's methods; register it
+    after the metrics so rejected commands aren't timed.
+    """
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    async def guarded_execute_command(*args, **options):
+        return await breaker.call(execute_command, *args, **options)
+
+    def guarded_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def guarded_execute(*execute_args, **execute_kwargs):
+            return await breaker.call(execute, *execute_args, **execute_kwargs)
+
+        pipe.execute = guarded_execute
+        return pipe
+
+    client.execute_command = guarded_execute_command
+    client.pipeline = guarded_pipeline
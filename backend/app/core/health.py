@@ -0,0 +1,62 @@
+"""
+Dependency status for `GET /health`.
+
+The database must answer for the worker to be healthy (503 otherwise). Redis
+being down only degrades the service: caches are skipped and bookings follow
+REDIS_LOCK_FALLBACK, so it is reported with its circuit breaker state but
+keeps the status code at 200.
+"""
+import asyncio
+import os
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from app.core.redis import redis_breaker, redis_client
+from app.core.replicas import replica_router
+from app.database import async_engine
+from app.services import appointment_service
+
+
+load_dotenv()
+
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "1"))
+
+
+async def ping_database() -> None:
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+async def check_database() -> dict:
+    try:
+        await asyncio.wait_for(ping_database(), HEALTH_CHECK_TIMEOUT)
+        return {"status": "ok"}
+    except Exception as e:
+        return {"status": "unavailable", "error": str(e) or type(e).__name__}
+
+async def check_redis() -> dict:
+    # The ping goes through the breaker: it fails fast while open and is the probe when half-open
+    try:
+        await asyncio.wait_for(redis_client.ping(), HEALTH_CHECK_TIMEOUT)
+        status = {"status": "ok"}
+    except Exception as e:
+        status = {"status": "unavailable", "error": str(e) or type(e).__name__}
+    return {**status, "circuit": redis_breaker.status()}
+
+
+async def health_status() -> tuple[int, dict]:
+    """(HTTP status, body) describing the database, Redis and read replicas."""
+    database, redis = await asyncio.gather(check_database(), check_redis())
+    body = {
+        "status": "ok",
+        "database": database,
+        "redis": redis,
+        "booking": {"lock_mode": appointment_service.BOOKING_LOCK_MODE, "redis_fallback": appointment_service.REDIS_LOCK_FALLBACK},
+    }
+    if replica_router.replicas:
+        body["replicas"] = {replica.name: "ok" if replica.healthy else "unavailable" for replica in replica_router.replicas}
+    if database["status"] != "ok":
+        body["status"] = "unavailable"
+        return 503, body
+    if redis["status"] != "ok" or any(value != "ok" for value in body.get("replicas", {}).values()):
+        body["status"] = "degraded"
+    return 200, body
@@ -0,0 +1,180 @@
+"""
+Central logging setup.
+
+Call `setup_logging()` once per process (main.py and the CLIs do). Modules only
+create `logger = logging.getLogger(__name__)`.
+
+Records are put on an in-memory queue by a QueueHandler, which never blocks on
+I/O, and a background QueueListener thread formats and writes them to stderr.
+Every record carries the current request's id, method, path, route and user
+(set by RequestContextMiddleware and the auth dependencies), as JSON
+(LOG_FORMAT=json, the default) or as plain text (LOG_FORMAT=text). LOG_LEVEL
+(default INFO) gates debug output before anything is formatted.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+class RequestContext:
+    """What the log records of one request share; the auth dependencies fill in the user."""
+    __slots__ = ("request_id", "method", "path", "scope", "user_id", "user_type")
+
+    def __init__(self, request_id: str, method: str, path: str, scope: dict):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.scope = scope
+        self.user_id: Optional[int] = None
+        self.user_type: Optional[str] = None
+
+
+request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def bind_user(user_type: str, user_id: int) -> None:
+    """Attach the authenticated user to the current request's log records."""
+    context = request_context.get()
+    if context is not None:
+        context.user_type = user_type
+        context.user_id = user_id
+
+
+class RequestContextFilter(logging.Filter):
+    """Copy the request context onto each record. Runs in the logging thread of the caller."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = request_context.get()
+        if context is not None:
+            record.request_id = context.request_id
+            record.method = context.method
+            record.path = context.path
+            record.route = getattr(context.scope.get("route"), "path", None)
+            record.user_id = context.user_id
+            record.user_type = context.user_type
+        return True
+
+
+class ContextQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Defer formatting to the listener thread; only resolve the message and traceback here
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.msg, record.args = record.message, None
+        return record
+
+
+CONTEXT_FIELDS = ("request_id", "method", "path", "route", "user_type", "user_id")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line. Structured payloads passed as extra={"data": {...}} are merged in."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        data = getattr(record, "data", None)
+        if isinstance(data, dict):
+            entry.update(data)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        if getattr(record, "request_id", None):
+            line += f" [request_id={record.request_id}]"
+        data = getattr(record, "data", None)
+        if isinstance(data, dict):
+            line += " " + json.dumps(data, default=str)
+        return line
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> None:
+    """Route every logger through the non-blocking queue handler. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = ContextQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    # uvicorn configures its own loggers with direct stream handlers; hand them to the root's queue
+    for name in UVICORN_LOGGERS:
+        server_logger = logging.getLogger(name)
+        server_logger.handlers.clear()
+        server_logger.propagate = True
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware giving every request an id (the incoming X-Request-ID, or a new one),
+    echoed in the response, and making it available to log records.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER.lower().encode())
+        request_id = incoming.decode("latin-1")[:64] if incoming else uuid.uuid4().hex
+        token = request_context.set(RequestContext(request_id, scope["method"], scope["path"], scope))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(REQUEST_ID_HEADER.lower().encode(), request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_context.reset(token)
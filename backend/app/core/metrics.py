@@ -0,0 +1,387 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+
+# -------------------- Database pool ----------------------------
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool.",
+    ["pool"],
+)
+DB_POOL_CHECKED_IN = Gauge(
+    "db_pool_checked_in_connections",
+    "Idle connections currently held by the pool.",
+    ["pool"],
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections opened beyond pool_size (negative while the pool is still filling).",
+    ["pool"],
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured pool_size.",
+    ["pool"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool.",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after pool_timeout.",
+    ["pool"],
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited."""
+    pool_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(self.pool_label).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.pool_label).observe(time.perf_counter() - start)
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited."""
+    pool_label = "async"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(self.pool_label).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.pool_label).observe(time.perf_counter() - start)
+
+
+def register_pool_gauges(engine, label: str) -> None:
+    """Expose an engine's pool counters as gauges (read at scrape time)."""
+    def _read(method: str):
+        # engine.pool is looked up on every scrape since dispose() replaces it
+        def read():
+            value = getattr(engine.pool, method, None)
+            return value() if callable(value) else 0
+        return read
+
+    DB_POOL_CHECKED_OUT.labels(label).set_function(_read("checkedout"))
+    DB_POOL_CHECKED_IN.labels(label).set_function(_read("checkedin"))
+    DB_POOL_OVERFLOW.labels(label).set_function(_read("overflow"))
+    DB_POOL_SIZE.labels(label).set_function(_read("size"))
+
+
+# -------------------- Read replicas ----------------------------
+
+DB_REPLICA_HEALTHY = Gauge(
+    "db_replica_healthy",
+    "Whether a read replica is in rotation (1) or not (0).",
+    ["replica"],
+)
+DB_READ_SESSIONS = Counter(
+    "db_read_sessions_total",
+    "Read-only sessions by where they went (replica / primary / primary_sticky / primary_fallback).",
+    ["target"],
+)
+
+
+# -------------------- Caches ----------------------------
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit / miss).",
+    ["cache", "result"],
+)
+
+
+# -------------------- Password hashing pool ----------------------------
+
+PASSWORD_QUEUE_WAIT = Histogram(
+    "password_job_queue_wait_seconds",
+    "Time a bcrypt job waited for a free worker thread.",
+    ["op"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+PASSWORD_JOB_DURATION = Histogram(
+    "password_job_duration_seconds",
+    "Time spent hashing / verifying a password.",
+    ["op"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5),
+)
+PASSWORD_JOBS_PENDING = Gauge(
+    "password_jobs_pending",
+    "bcrypt jobs queued or running.",
+)
+PASSWORD_JOBS_REJECTED = Counter(
+    "password_jobs_rejected_total",
+    "bcrypt jobs refused because the queue was full.",
+    ["op"],
+)
+
+
+# -------------------- HTTP requests ----------------------------
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response, by route template.",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Requests by route template and response status.",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled.",
+    ["method"],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed while handling one request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements while handling one request.",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+REDIS_TIME_PER_REQUEST = Histogram(
+    "http_request_redis_seconds",
+    "Time spent in Redis commands while handling one request.",
+    ["route"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+
+class RequestStats:
+    """
+    Per-request SQL / Redis totals, filled in by the engine and Redis hooks.
+    `trace` is a list only while the request is being profiled (see app/core/profiling.py).
+    """
+    __slots__ = ("started", "db_queries", "db_seconds", "redis_commands", "redis_seconds", "trace")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.redis_commands = 0
+        self.redis_seconds = 0.0
+        self.trace: Optional[list] = None
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def trace_event(kind: str, elapsed: Optional[float] = None, **fields) -> None:
+    """Add an entry to the current request's profile; a no-op unless it is being profiled."""
+    stats = current_request.get()
+    if stats is None or stats.trace is None:
+        return
+    entry = {"kind": kind, "at_ms": round((time.perf_counter() - stats.started) * 1000, 3)}
+    if elapsed is not None:
+        entry["ms"] = round(elapsed * 1000, 3)
+        entry["at_ms"] = round(entry["at_ms"] - entry["ms"], 3)  # When it started
+    entry.update(fields)
+    stats.trace.append(entry)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status counts, in-flight requests and the
+    request's SQL / Redis usage. Routes are labelled by template (/doctors/{doctor_id}),
+    unmatched paths as "unmatched", so label cardinality stays bounded.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        stats = RequestStats()
+        token = current_request.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.labels(method).inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_REQUESTS_IN_PROGRESS.labels(method).dec()
+            current_request.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.db_queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.db_seconds)
+            REDIS_TIME_PER_REQUEST.labels(route).observe(stats.redis_seconds)
+
+
+# -------------------- SQL statements ----------------------------
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Time spent executing a SQL statement, by engine and statement type.",
+    ["engine", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_QUERY_ERRORS = Counter(
+    "db_query_errors_total",
+    "SQL statements that raised, by engine and statement type.",
+    ["engine", "operation"],
+)
+
+
+def statement_operation(statement: str) -> str:
+    """SELECT / INSERT / UPDATE / DELETE / ..., from the statement's first word."""
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+def register_query_metrics(engine, label: str) -> None:
+    """Time every statement the engine executes and add it to the current request's totals."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERY_DURATION.labels(label, statement_operation(statement)).observe(elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+            if stats.trace is not None:
+                # executemany parameter lists can be huge; keep the first few rows
+                trace_event("sql", elapsed, engine=label, statement=statement,
+                            parameters=parameters[:10] if executemany else parameters)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        DB_QUERY_ERRORS.labels(label, statement_operation(context.statement or "")).inc()
+
+
+# -------------------- Redis ----------------------------
+
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Round trip of a Redis command (scripts show up as EVALSHA, pipelines as PIPELINE).",
+    ["command"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+REDIS_COMMAND_ERRORS = Counter(
+    "redis_command_errors_total",
+    "Redis commands that raised (connection errors, timeouts, ...).",
+    ["command"],
+)
+
+
+def observe_redis(command: str, elapsed: float, failed: bool) -> None:
+    REDIS_COMMAND_DURATION.labels(command).observe(elapsed)
+    if failed:
+        REDIS_COMMAND_ERRORS.labels(command).inc()
+    stats = current_request.get()
+    if stats is not None:
+        stats.redis_commands += 1
+        stats.redis_seconds += elapsed
+        if stats.trace is not None:
+            trace_event("redis", elapsed, command=command, failed=failed)
+
+
+def register_redis_metrics(client) -> None:
+    """
+    Time every command sent through an asyncio Redis client, including scripts and pipelines.
+    Wraps the instance's methods, so it works for any client class (e.g. fakeredis in tests).
+    """
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    async def timed_execute_command(*args, **options):
+        start, failed = time.perf_counter(), True
+        try:
+            result = await execute_command(*args, **options)
+            failed = False
+            return result
+        finally:
+            observe_redis(str(args[0]).upper(), time.perf_counter() - start, failed)
+
+    def timed_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def timed_execute(*execute_args, **execute_kwargs):
+            start, failed = time.perf_counter(), True
+            try:
+                result = await execute(*execute_args, **execute_kwargs)
+                failed = False
+                return result
+            finally:
+                observe_redis("PIPELINE", time.perf_counter() - start, failed)
+
+        pipe.execute = timed_execute
+        return pipe
+
+    client.execute_command = timed_execute_command
+    client.pipeline = timed_pipeline
+
+
+# -------------------- Circuit breakers ----------------------------
+
+CIRCUIT_BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state: 0 closed, 1 half-open, 2 open.",
+    ["breaker"],
+)
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    "circuit_breaker_transitions_total",
+    "Circuit breaker state changes, by the state entered.",
+    ["breaker", "state"],
+)
+CIRCUIT_BREAKER_REJECTED = Counter(
+    "circuit_breaker_rejected_total",
+    "Calls failed fast because the breaker was open.",
+    ["breaker"],
+)
+BOOKING_LOCK_FALLBACKS = Counter(
+    "booking_lock_fallbacks_total",
+    "Bookings made without Redis locks because Redis was unavailable, by fallback (database / reject).",
+    ["fallback"],
+)
+
+
+# -------------------- Exposition ----------------------------
+
+def render_metrics() -> tuple[bytes, str]:
+    """Return the Prometheus text payload and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from app.core.metrics import PASSWORD_QUEUE_WAIT, PASSWORD_JOB_DURATION, PASSWORD_JOBS_PENDING, PASSWORD_JOBS_REJECTED, trace_event
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# bcrypt releases the GIL while hashing, so threads give real parallelism
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+# Jobs allowed to wait for a worker before new ones are refused with 503
+PASSWORD_HASH_QUEUE_DEPTH = int(os.getenv("PASSWORD_HASH_QUEUE_DEPTH", "64"))
+
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+# Jobs queued or running. Only touched from the event loop thread.
+_pending = 0
+
+
+async def run_password_job(op: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a password hash / verify call on the bcrypt pool without blocking the event loop.
+    Raises 503 when PASSWORD_HASH_QUEUE_DEPTH jobs are already waiting.
+    """
+    global _pending
+    if _pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_DEPTH:
+        PASSWORD_JOBS_REJECTED.labels(op).inc()
+        logger.warning(f"Password pool full ({_pending} pending), rejecting {op}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+    submitted = time.perf_counter()
+    timings = {}
+
+    def job():
+        started = time.perf_counter()
+        timings["wait"] = started - submitted
+        PASSWORD_QUEUE_WAIT.labels(op).observe(started - submitted)
+        try:
+            return fn(*args)
+        finally:
+            PASSWORD_JOB_DURATION.labels(op).observe(time.perf_counter() - started)
+
+    _pending += 1
+    PASSWORD_JOBS_PENDING.inc()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, job)
+    finally:
+        _pending -= 1
+        PASSWORD_JOBS_PENDING.dec()
+        trace_event("password", time.perf_counter() - submitted, op=op, wait_ms=round(timings.get("wait", 0) * 1000, 3))
+
+
+async def run_password_jobs(op: str, fn: Callable[..., Any], args_list: list[tuple], concurrency: int) -> list[Any]:
+    """
+    Run many password jobs (bulk imports) with at most `concurrency` on the pool at once,
+    leaving the remaining workers and the queue to interactive logins. Never rejects.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    loop = asyncio.get_running_loop()
+
+    def job(args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            PASSWORD_JOB_DURATION.labels(op).observe(time.perf_counter() - started)
+
+    async def run(args):
+        async with semaphore:
+            return await loop.run_in_executor(password_executor, job, args)
+
+    return await asyncio.gather(*(run(args) for args in args_list))
@@ -0,0 +1,132 @@
+"""
+Opt-in per-request profiling and slow-request logging.
+
+A profiled request records every SQL statement (with parameters and duration),
+Redis command, lock retry and bcrypt job in order, and the whole trace is
+logged as one structured record when the request ends. The response carries a
+Server-Timing header with the SQL / Redis / total time.
+
+Profiling is enabled per request by sending `X-Profile: <PROFILE_TOKEN>`
+(REQUEST_PROFILING=header, the default; without a PROFILE_TOKEN the header is
+ignored, since traces contain query parameters), or for every request with
+REQUEST_PROFILING=all. Independently, any request slower than SLOW_REQUEST_MS is
+logged with its SQL / Redis totals, plus its trace if it was profiled. With
+PROFILE_EXPLAIN on, profiled slow requests also include the EXPLAIN plan of
+every SELECT slower than SLOW_QUERY_MS.
+"""
+import asyncio
+import logging
+import os
+import secrets
+import time
+from dotenv import load_dotenv
+
+from app.core.metrics import RequestStats, current_request
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING", "header").lower()  # off / header / all
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_HEADER = b"x-profile"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+PROFILE_EXPLAIN = os.getenv("PROFILE_EXPLAIN", "false").lower() in ("1", "true", "yes")
+
+
+def profiling_requested(scope) -> bool:
+    if REQUEST_PROFILING == "all":
+        return True
+    if REQUEST_PROFILING != "header" or not PROFILE_TOKEN:
+        return False
+    value = dict(scope["headers"]).get(PROFILE_HEADER)
+    return value is not None and secrets.compare_digest(value.decode("latin-1"), PROFILE_TOKEN)
+
+
+def explain(statement: str, parameters) -> list:
+    """The query plan of a captured statement, run on the sync engine (call it in a thread)."""
+    from app.database import engine
+
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.exec_driver_sql(prefix + statement, parameters)]
+
+
+async def explain_slow_queries(trace: list) -> None:
+    for entry in trace:
+        if entry["kind"] == "sql" and entry["ms"] >= SLOW_QUERY_MS and entry["statement"].lstrip().upper().startswith("SELECT"):
+            try:
+                entry["explain"] = await asyncio.to_thread(explain, entry["statement"], entry["parameters"])
+            except Exception as e:
+                entry["explain_error"] = str(e)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that turns on tracing for profiled requests and logs profiled and slow
+    requests. Runs inside MetricsMiddleware and shares its per-request RequestStats.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (REQUEST_PROFILING == "off" and SLOW_REQUEST_MS <= 0):
+            return await self.app(scope, receive, send)
+
+        stats = current_request.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = current_request.set(stats)
+        profiled = profiling_requested(scope)
+        if profiled:
+            stats.trace = []
+
+        status, streaming = 500, False
+
+        async def send_wrapper(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = dict(message.get("headers", []))
+                streaming = headers.get(b"content-type", b"").startswith(b"text/event-stream")
+                if profiled:
+                    timing = (
+                        f"db;desc=\"{stats.db_queries} queries\";dur={stats.db_seconds * 1000:.1f}, "
+                        f"redis;desc=\"{stats.redis_commands} commands\";dur={stats.redis_seconds * 1000:.1f}, "
+                        f"total;dur={(time.perf_counter() - stats.started) * 1000:.1f}"
+                    )
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                current_request.reset(token)
+            total_ms = (time.perf_counter() - stats.started) * 1000
+            slow = SLOW_REQUEST_MS > 0 and total_ms >= SLOW_REQUEST_MS and not streaming
+            if profiled or slow:
+                await self.log_request(scope, status, stats, total_ms, slow)
+
+    async def log_request(self, scope, status: int, stats: RequestStats, total_ms: float, slow: bool) -> None:
+        record = {
+            "event": "slow_request" if slow else "request_profile",
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(scope.get("route"), "path", None),
+            "status": status,
+            "total_ms": round(total_ms, 3),
+            "db_queries": stats.db_queries,
+            "db_ms": round(stats.db_seconds * 1000, 3),
+            "redis_commands": stats.redis_commands,
+            "redis_ms": round(stats.redis_seconds * 1000, 3),
+        }
+        if stats.trace is not None:
+            if slow and PROFILE_EXPLAIN:
+                await explain_slow_queries(stats.trace)
+            record["trace"] = stats.trace
+        log = logger.warning if slow else logger.info
+        log(record["event"], extra={"data": record})
@@ -1,80 +1,183 @@
+import asyncio
 import logging
-import redis
+import random
+import secrets
+import redis.asyncio as redis
 from datetime import datetime
-from time import sleep
+from typing import Optional
 import os
 from dotenv import load_dotenv
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError, register_circuit_breaker
+from app.core.metrics import register_redis_metrics, trace_event
 
 
-load_dotenv() 
+load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Get Redis host from environment variable (with localhost as default)
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost") 
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+# Short timeouts: every caller has a fallback, so a slow Redis must not hold requests up
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "1"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1"))
+# Consecutive connection errors / timeouts that open the breaker, and seconds until it probes again
+REDIS_BREAKER_FAILURES = int(os.getenv("REDIS_BREAKER_FAILURES", "5"))
+REDIS_BREAKER_RESET_SECONDS = float(os.getenv("REDIS_BREAKER_RESET_SECONDS", "10"))
 
-# Redis connection with pooling
+
+class RedisCircuitOpenError(CircuitOpenError, redis.ConnectionError):
+    """A connection error, so every existing Redis error handler treats it as Redis being down."""
+
+
+# Async Redis connection with pooling
 redis_client = redis.Redis(
-    host=REDIS_HOST,  
+    host=REDIS_HOST,
     port=6379,
     db=0,
-    max_connections=10,
+    max_connections=50,
     decode_responses=True,
-    socket_connect_timeout=5,  
-    socket_timeout=5           
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT
 )
+register_redis_metrics(redis_client)
+
+# While Redis is down, commands fail at once instead of each waiting for its timeout
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=REDIS_BREAKER_FAILURES,
+    reset_timeout=REDIS_BREAKER_RESET_SECONDS,
+    failure_types=(redis.ConnectionError, redis.TimeoutError, OSError),
+    open_error=RedisCircuitOpenError,
+)
+register_circuit_breaker(redis_client, redis_breaker)
+
+# Set every key only if none of them is held, so the doctor and patient locks
+# are taken together or not at all. Returns 0 on success, otherwise the
+# (1-based) position of the first key that is already locked.
+ACQUIRE_LOCKS_SCRIPT = redis_client.register_script("""
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        return i
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, ARGV[1], 'PX', ARGV[2])
+end
+return 0
+""")
+
+# Best-effort variant: KEYS are consecutive groups of ARGV[3] keys, and each
+# group is taken on its own, all of its keys or none. Returns one flag per
+# group (1 = acquired).
+ACQUIRE_LOCK_GROUPS_SCRIPT = redis_client.register_script("""
+local size = tonumber(ARGV[3])
+local acquired = {}
+for first = 1, #KEYS, size do
+    local free = 1
+    for i = first, first + size - 1 do
+        if redis.call('EXISTS', KEYS[i]) == 1 then
+            free = 0
+            break
+        end
+    end
+    if free == 1 then
+        for i = first, first + size - 1 do
+            redis.call('SET', KEYS[i], ARGV[1], 'PX', ARGV[2])
+        end
+    end
+    table.insert(acquired, free)
+end
+return acquired
+""")
+
+# Delete only the keys still owned by this token, so a lock that expired and
+# was taken by another request is never released by us.
+RELEASE_LOCKS_SCRIPT = redis_client.register_script("""
+local released = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('DEL', key)
+        released = released + 1
+    end
+end
+return released
+""")
+
+
+def doctor_lock_key(doctor_id: int, scheduled_datetime: datetime) -> str:
+    return f"appointment:doctor:{doctor_id}:{scheduled_datetime.isoformat()}"
+
+def patient_lock_key(patient_id: int, scheduled_datetime: datetime) -> str:
+    return f"appointment:patient:{patient_id}:{scheduled_datetime.isoformat()}"
 
+def slot_lock_keys(doctor_id: int, patient_id: int, scheduled_datetime: datetime) -> list[str]:
+    return [doctor_lock_key(doctor_id, scheduled_datetime), patient_lock_key(patient_id, scheduled_datetime)]
 
-def acquire_doctor_lock(doctor_id: int, scheduled_datetime: datetime, timeout: int = 10, retries: int = 3, delay: float = 0.5) -> bool:
+
+async def acquire_locks(keys: list[str], timeout: int = 10, retries: int = 3, delay: float = 0.1) -> Optional[str]:
     """
-    Acquire a lock for a doctor's time slot with retry logic.
+    Atomically acquire all lock keys, retrying with exponential backoff and jitter.
+    Returns the owner token needed to release them, or None if they stayed busy.
     """
-    lock_key = f"appointment:doctor:{doctor_id}:{scheduled_datetime.isoformat()}"
+    token = secrets.token_hex(16)
     for attempt in range(retries):
-        if redis_client.set(lock_key, "locked", nx=True, ex=timeout):
-            logger.debug(f"Acquired doctor lock: {lock_key}")
-            return True
-        logger.debug(f"Failed to acquire doctor lock: {lock_key}, attempt {attempt + 1}/{retries}")
-        sleep(delay)
-    return False
-
-def release_doctor_lock(doctor_id: int, scheduled_datetime: datetime) -> None:
+        held = await ACQUIRE_LOCKS_SCRIPT(keys=keys, args=[token, timeout * 1000])
+        if held == 0:
+            logger.debug(f"Acquired locks: {keys}")
+            return token
+        logger.debug(f"Lock busy: {keys[held - 1]}, attempt {attempt + 1}/{retries}")
+        trace_event("lock_busy", key=keys[held - 1], attempt=attempt + 1)
+        if attempt + 1 < retries:
+            # Full jitter keeps competing requests from retrying in lockstep
+            await asyncio.sleep(random.uniform(0, delay * 2 ** attempt))
+    return None
+
+async def acquire_lock_groups(groups: list[list[str]], timeout: int = 10) -> tuple[str, list[bool]]:
     """
-    Release a lock for a doctor's time slot.
+    Try every group of lock keys in one atomic step, taking each group whole or not at all.
+    Returns the owner token and whether each group was acquired; busy groups are not retried.
     """
-    lock_key = f"appointment:doctor:{doctor_id}:{scheduled_datetime.isoformat()}"
-    redis_client.delete(lock_key)
-    logger.debug(f"Released doctor lock: {lock_key}")
+    token = secrets.token_hex(16)
+    if not groups:
+        return token, []
+    keys = [key for group in groups for key in group]
+    acquired = await ACQUIRE_LOCK_GROUPS_SCRIPT(keys=keys, args=[token, timeout * 1000, len(groups[0])])
+    return token, [bool(flag) for flag in acquired]
 
-def acquire_patient_lock(patient_id: int, scheduled_datetime: datetime, timeout: int = 10, retries: int = 3, delay: float = 0.5) -> bool:
+async def release_locks(keys: list[str], token: str) -> None:
     """
-    Acquire a lock for a patient's time slot with retry logic.
+    Release the lock keys still owned by token. If Redis is unavailable the locks are left
+    to expire, so a committed booking is never turned into an error.
     """
-    lock_key = f"appointment:patient:{patient_id}:{scheduled_datetime.isoformat()}"
-    for attempt in range(retries):
-        if redis_client.set(lock_key, "locked", nx=True, ex=timeout):
-            logger.debug(f"Acquired patient lock: {lock_key}")
-            return True
-        logger.debug(f"Failed to acquire patient lock: {lock_key}, attempt {attempt + 1}/{retries}")
-        sleep(delay)
-    return False
-
-def release_patient_lock(patient_id: int, scheduled_datetime: datetime) -> None:
+    try:
+        released = await RELEASE_LOCKS_SCRIPT(keys=keys, args=[token])
+    except redis.RedisError as e:
+        logger.warning(f"Failed to release locks, leaving them to expire: {keys}: {e}")
+        return
+    if released < len(keys):
+        logger.warning(f"Locks expired before release ({released}/{len(keys)} released): {keys}")
+    logger.debug(f"Released locks: {keys}")
+
+
+async def acquire_slot_locks(doctor_id: int, patient_id: int, scheduled_datetime: datetime, timeout: int = 10, retries: int = 3, delay: float = 0.1) -> Optional[str]:
     """
-    Release a lock for a patient's time slot.
+    Acquire the doctor's and the patient's lock for a time slot in one step.
     """
-    lock_key = f"appointment:patient:{patient_id}:{scheduled_datetime.isoformat()}"
-    redis_client.delete(lock_key)
-    logger.debug(f"Released patient lock: {lock_key}")
-    
-    
-    
+    return await acquire_locks(slot_lock_keys(doctor_id, patient_id, scheduled_datetime), timeout, retries, delay)
+
+async def release_slot_locks(doctor_id: int, patient_id: int, scheduled_datetime: datetime, token: str) -> None:
+    """
+    Release the doctor's and the patient's lock for a time slot.
+    """
+    await release_locks(slot_lock_keys(doctor_id, patient_id, scheduled_datetime), token)
+
+
 # Test redis connection
 if __name__ == "__main__":
+    from app.core.logging_config import setup_logging
+    setup_logging()
     try:
-        redis_client.ping()
+        asyncio.run(redis_client.ping())
         logger.info("✅ Redis connection successful!")
     except redis.ConnectionError as e:
-        logger.error(f"❌ Redis connection failed: {e}")
\ No newline at end of file
+        logger.error(f"❌ Redis connection failed: {e}")
@@ -0,0 +1,201 @@
+"""
+Read-replica routing.
+
+With DB_REPLICA_URLS set (comma-separated, same form as DATABASE_URL), read-only
+endpoints take their session from `get_async_read_db`, which picks a healthy
+replica round-robin. Everything else, including every write, keeps using the
+primary through `get_async_db`.
+
+- Health: each replica is checked with `SELECT 1` every DB_REPLICA_HEALTH_INTERVAL
+  seconds, and taken out of rotation at once when a connection to it drops.
+  With no healthy replica, reads fall back to the primary.
+- Read-your-writes: after a successful write (POST / PUT / PATCH / DELETE) by an
+  authenticated caller, that caller's reads go to the primary for
+  DB_REPLICA_STICKY_SECONDS, so they see their own changes despite replication
+  lag. The marker lives in this worker's memory and in Redis, so it holds
+  across workers.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Optional
+from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.cache import TTLCache
+from app.core.metrics import DB_READ_SESSIONS, DB_REPLICA_HEALTHY, InstrumentedAsyncAdaptedQueuePool, register_pool_gauges, register_query_metrics
+from app.core.redis import redis_client
+from app.database import AsyncSessionLocal, pool_options, to_async_url
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_HEALTH_INTERVAL = float(os.getenv("DB_REPLICA_HEALTH_INTERVAL", "5"))
+DB_REPLICA_HEALTH_TIMEOUT = float(os.getenv("DB_REPLICA_HEALTH_TIMEOUT", "2"))
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "10"))
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+READ_METHODS = {"GET", "HEAD"}
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        async_url = to_async_url(url)
+        poolclass = type(f"{name}Pool", (InstrumentedAsyncAdaptedQueuePool,), {"pool_label": name})
+        self.engine = create_async_engine(async_url, **pool_options(async_url, poolclass))
+        self.sessionmaker = async_sessionmaker(
+            bind=self.engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        self.healthy = False  # Until the first check passes
+        register_pool_gauges(self.engine.sync_engine, name)
+        register_query_metrics(self.engine.sync_engine, name)
+
+        @event.listens_for(self.engine.sync_engine, "handle_error")
+        def on_error(context):
+            if context.is_disconnect:
+                self.set_healthy(False, "connection lost")
+
+    def set_healthy(self, healthy: bool, reason: str = "") -> None:
+        if healthy != self.healthy:
+            log = logger.info if healthy else logger.warning
+            log(f"Replica {self.name} is {'healthy' if healthy else 'unhealthy'}{': ' + reason if reason else ''}")
+        self.healthy = healthy
+        DB_REPLICA_HEALTHY.labels(self.name).set(1 if healthy else 0)
+
+
+class ReplicaRouter:
+    def __init__(self, urls: list[str]):
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls)]
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[Replica]:
+        """The next healthy replica (round-robin), or None if there is none."""
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if replica.healthy:
+                return replica
+        return None
+
+    async def ping(self, replica: Replica) -> None:
+        async with replica.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            await asyncio.wait_for(self.ping(replica), DB_REPLICA_HEALTH_TIMEOUT)
+            replica.set_healthy(True)
+        except Exception as e:
+            replica.set_healthy(False, str(e) or type(e).__name__)
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(DB_REPLICA_HEALTH_INTERVAL)
+            await self.check_all()
+
+    async def start(self) -> None:
+        """Check every replica once, then keep checking in the background (called at startup)."""
+        if not self.replicas or self._task is not None:
+            return
+        await self.check_all()
+        self._task = asyncio.create_task(self._health_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_router = ReplicaRouter(DB_REPLICA_URLS)
+
+
+# -------------------- Read-your-writes ----------------------------
+
+# Callers (by token) that wrote recently and must read from the primary
+recent_writers = TTLCache("recent_writers", maxsize=10000, ttl=DB_REPLICA_STICKY_SECONDS)
+
+
+def writer_key(authorization: str) -> str:
+    return "db:primary:" + hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
+async def mark_recent_writer(authorization: str) -> None:
+    key = writer_key(authorization)
+    recent_writers.set(key, True)
+    try:
+        await redis_client.set(key, 1, px=int(DB_REPLICA_STICKY_SECONDS * 1000))
+    except Exception as e:
+        logger.warning(f"Failed to record recent writer in Redis: {e}")
+
+async def is_recent_writer(authorization: str) -> bool:
+    key = writer_key(authorization)
+    if recent_writers.get(key):
+        return True
+    try:
+        return bool(await redis_client.exists(key))
+    except Exception as e:
+        # Without Redis only this worker's memory is known; prefer the primary to stale reads
+        logger.warning(f"Failed to read recent writer from Redis: {e}")
+        return True
+
+
+async def choose_read_sessionmaker(request: Request) -> async_sessionmaker:
+    """Replica session factory for this read, or the primary's."""
+    target = "primary"
+    sessionmaker = AsyncSessionLocal
+    if replica_router.replicas and request.method in READ_METHODS:
+        authorization = request.headers.get("authorization")
+        if authorization and await is_recent_writer(authorization):
+            target = "primary_sticky"
+        else:
+            replica = replica_router.choose()
+            if replica is not None:
+                target, sessionmaker = "replica", replica.sessionmaker
+            else:
+                target = "primary_fallback"
+    DB_READ_SESSIONS.labels(target).inc()
+    return sessionmaker
+
+
+# Dependency to get a session for read-only endpoints
+async def get_async_read_db(request: Request):
+    sessionmaker = await choose_read_sessionmaker(request)
+    async with sessionmaker() as db:
+        yield db
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware marking authenticated callers whose write succeeded, before the
+    response goes out, so their next read can't race the marker.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_router.replicas or scope["method"] not in WRITE_METHODS:
+            return await self.app(scope, receive, send)
+
+        authorization = dict(scope["headers"]).get(b"authorization")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and authorization and message["status"] < 400:
+                await mark_recent_writer(authorization.decode("latin-1"))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,57 @@
+import logging
+import os
+from typing import Optional
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+
+# strict: refuse to start on a schema mismatch; warn: log it and start; off: skip the check
+SCHEMA_VERSION_CHECK = os.getenv("SCHEMA_VERSION_CHECK", "strict").lower()
+
+
+def alembic_config() -> Config:
+    """Alembic config that works from any working directory."""
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    return config
+
+def head_revision() -> Optional[str]:
+    """The newest migration shipped with this code."""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+async def current_revision(engine: AsyncEngine) -> Optional[str]:
+    """The migration the database is at (None if it was never migrated)."""
+    async with engine.connect() as conn:
+        return await conn.run_sync(lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision())
+
+
+async def check_schema_version(engine: AsyncEngine) -> None:
+    """
+    Compare the database's migration with the code's head. Runs at startup instead of
+    any DDL; migrations and seeding belong to `python -m app.bootstrap`.
+    """
+    if SCHEMA_VERSION_CHECK == "off":
+        return
+    try:
+        current, head = await current_revision(engine), head_revision()
+    except Exception as e:
+        logger.warning(f"Schema version check skipped, database unavailable: {e}")
+        return
+
+    if current == head:
+        logger.info(f"Database schema at {current}")
+        return
+    message = f"Database schema is at {current}, this code expects {head}. Run `python -m app.bootstrap`."
+    if SCHEMA_VERSION_CHECK == "strict":
+        raise RuntimeError(message)
+    logger.warning(message)
@@ -1,25 +1,95 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
+from app.core.metrics import InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool, register_pool_gauges, register_query_metrics
 
 
-load_dotenv() 
+load_dotenv()
 
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_NAME = os.getenv("DB_NAME")
 
+# Connection pool settings (per engine, per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Below MySQL's wait_timeout
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
 
 
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+# Sync drivers and the async drivers that replace them for the API
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+def to_async_url(url: str) -> str:
+    """Swap a sync database URL's driver for its async counterpart."""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+# DATABASE_URL overrides the MySQL settings (e.g. sqlite:///./test.db for tests)
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+)
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    to_async_url(SQLALCHEMY_DATABASE_URL)
+)
+
+
+def pool_options(url: str, poolclass) -> dict:
+    """Engine keyword arguments for the configured connection pool."""
+    if url.startswith("sqlite"):
+        # SQLite picks its own pool (and :memory: can't use a queue pool)
+        return {"connect_args": {"check_same_thread": False}} if "aiosqlite" not in url else {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+# Sync engine, used by scripts and the specialization seeding
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    **pool_options(SQLALCHEMY_DATABASE_URL, InstrumentedQueuePool)
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine, used by the API so queries don't block the event loop
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **pool_options(ASYNC_SQLALCHEMY_DATABASE_URL, InstrumentedAsyncAdaptedQueuePool)
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,  # Keep loaded attributes usable after commit (no lazy IO)
+)
 Base = declarative_base()
 
+register_pool_gauges(engine, "sync")
+register_pool_gauges(async_engine.sync_engine, "async")
+register_query_metrics(engine, "sync")
+register_query_metrics(async_engine.sync_engine, "async")
+
 
 # Dependency to get database sessions
 def get_db():
@@ -27,4 +97,10 @@ def get_db():
     try:
         yield db  # Provide session to route
     finally:
-        db.close()  # Close after request completes
\ No newline at end of file
+        db.close()  # Close after request completes
+
+
+# Dependency to get async database sessions
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db  # Provide session to route, closed when the request completes
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Enum as SQLAlchemyEnum, func
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, Computed, Enum as SQLAlchemyEnum, func
 from enum import Enum
 from app.database import Base
 
@@ -21,5 +21,24 @@ class Appointment(Base):
         default=AppointmentStatus.SCHEDULED
     )
 
+    # 1 for live appointments, NULL once cancelled. MySQL has no partial indexes, and
+    # NULLs never collide in a unique index, so this makes "one live appointment per
+    # doctor slot / patient time" enforceable while cancelled slots can be re-booked.
+    active_slot = Column(
+        Integer,
+        Computed("CASE WHEN status <> 'CANCELLED' THEN 1 END", persisted=True)
+    )
+
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
+
+    __table_args__ = (
+        # Doctor availability / booked slots: doctor_id + time range, status filter
+        Index("ix_appointments_doctor_schedule_status", "doctor_id", "scheduled_datetime", "status"),
+        # Patient checks: patient_id + exact time / future range, status filter
+        Index("ix_appointments_patient_schedule_status", "patient_id", "scheduled_datetime", "status"),
+        # A doctor can only hold one non-cancelled appointment per slot
+        Index("uq_appointments_doctor_active_slot", "doctor_id", "scheduled_datetime", "active_slot", unique=True),
+        # ...and a patient one per time
+        Index("uq_appointments_patient_active_slot", "patient_id", "scheduled_datetime", "active_slot", unique=True),
+    )
@@ -12,7 +12,9 @@ class Doctor(Base):
     date_of_birth = Column(Date, nullable=False)
     gender = Column(String(10), nullable=False)
     specialization_id = Column(Integer, ForeignKey("specializations.id"), nullable=False)
-    specialization = relationship("Specialization", back_populates="doctors")  # Many-to-one
+    # Joined into every doctor query: DoctorResponse nests it, and async sessions can't lazy-load
+    # while serializing, so loading it per doctor would be an N+1 (or fail outright).
+    specialization = relationship("Specialization", back_populates="doctors", lazy="joined", innerjoin=True)  # Many-to-one
     email = Column(String(100), unique=True, nullable=False)
     phone = Column(String(20), nullable=False)
     address = Column(String(200), nullable=True)
@@ -1,8 +1,14 @@
-from app.database import SessionLocal
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.database import engine
 from app.models.specialization import Specialization
+import logging
 import os
 
 
+logger = logging.getLogger(__name__)
+
 file_name = "specializations.txt"
 file_path = os.path.join(os.path.dirname(__file__), file_name)
 
@@ -16,21 +22,29 @@ def read_specializations(file_path: str):
         specializations = [line.strip() for line in f if line.strip()]
     return specializations
 
-def insert_specializations():
-    specializations_list = read_specializations(file_path)
-    db = SessionLocal()
-    try:
-        for name in specializations_list:
-            exists = db.query(Specialization).filter(Specialization.name == name).first()
-            if not exists:
-                specialization = Specialization(name=name)
-                db.add(specialization)
-        db.commit()
-        print("Specializations inserted successfully.")
-    except Exception as e:
-        db.rollback()
-        print(f"Error inserting specializations: {e}")
-    finally:
-        db.close()
+def upsert_specializations_statement(dialect_name: str):
+    """A single INSERT that skips names already present (the name column is unique)."""
+    if dialect_name == "mysql":
+        stmt = mysql_insert(Specialization)
+        return stmt.on_duplicate_key_update(name=stmt.inserted.name)
+    if dialect_name == "sqlite":
+        return sqlite_insert(Specialization).on_conflict_do_nothing(index_elements=["name"])
+    return None
 
-    
\ No newline at end of file
+def insert_specializations() -> int:
+    """
+    Idempotently insert every specialization from specializations.txt in one bulk statement.
+    Returns the number of names submitted.
+    """
+    rows = [{"name": name} for name in dict.fromkeys(read_specializations(file_path))]
+    with engine.begin() as conn:
+        stmt = upsert_specializations_statement(conn.dialect.name)
+        if stmt is None:
+            # Other databases: one lookup of the existing names, then one insert of the rest
+            existing = set(conn.execute(select(Specialization.name)).scalars())
+            rows = [row for row in rows if row["name"] not in existing]
+            stmt = insert(Specialization)
+        if rows:
+            conn.execute(stmt, rows)
+    logger.info(f"Specializations inserted successfully ({len(rows)} names).")
+    return len(rows)
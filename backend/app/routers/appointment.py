@@ -1,137 +1,266 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import time, datetime, timezone, date
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from typing import List, Optional
+from datetime import time, datetime, timezone, date, timedelta
 from app.models.doctor import Doctor
-from app.database import get_db
-from app.models.appointment import Appointment as AppointmentModel, AppointmentStatus as AppointmentStatusModel
-from app.schemas.appointment import AppointmentCreate as AppointmentCreateModel, AppointmentResponse as AppointmentResponseModel
+from app.database import get_async_db
+from app.core.replicas import choose_read_sessionmaker, get_async_read_db
+from app.models.appointment import AppointmentStatus as AppointmentStatusModel
+from app.schemas.appointment import AppointmentCreate as AppointmentCreateModel, AppointmentResponse as AppointmentResponseModel, AvailabilityResponse
+from app.schemas.appointment import APPOINTMENT_BATCH_MAX, AppointmentBatchCreate, AppointmentBatchResponse, BookingMode
 from app.utils.helper import (
     doctor_exists,
     patient_exists,    
-    patient_has_future_appointment_with_doctor,
-    check_patient_available_at_time,
-    get_all_appointments_for_patient,
-    get_all_appointments_for_doctor,
-    get_booked_slots_for_doctor,
+    get_appointments_page_for_patient,
+    get_appointments_page_for_doctor,
+    get_appointment_by_id,
 )
-from app.services.appointment_service import create_appointment_with_lock
+from app.services.appointment_service import batch_failure, create_appointment_batch, create_appointment_with_lock, reject_batch
+from app.services.appointment_export import EXPORT_MEDIA_TYPES, stream_appointments_export
+from app.services.availability_service import AVAILABILITY_MAX_DAYS, get_availability_page, stream_availability
+from app.services.events import publish_appointment_event
+from app.services.specialization_catalog import specialization_catalog
+from app.services.slot_index import SLOT_START_HOUR, SLOT_END_HOUR, read_bitmap, fill_bitmap, slots_from_bitmap, mark_slot
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_next_cursor
 from app.auth import get_current_doctor, get_current_patient
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/appointments", tags=["appointments"])
 
+
+def as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert a filter datetime to the naive UTC values stored in the database."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def slot_time_error(scheduled_utc: datetime, now: datetime) -> Optional[str]:
+    """Why a UTC time can't be booked (past, outside working hours, not on the hour), or None."""
+    if scheduled_utc < now:
+        return "Appointments must be scheduled for future time slots."
+    if not (time(9, 0) <= scheduled_utc.time() < time(17, 0)):
+        return "Appointments must be scheduled between 09:00 and 17:00."
+    if scheduled_utc.minute != 0 or scheduled_utc.second != 0:
+        return "Appointments must be scheduled on 1 hour intervals (e.g., 09:00, 10:00)."
+    return None
+
+
 @router.post("/", response_model=AppointmentResponseModel)
-def create_appointment(
+async def create_appointment(
     appointment: AppointmentCreateModel,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_patient: dict = Depends(get_current_patient)
 ):
     """
     Schedule a new appointment if doctor and patient are available (requires patient authentication).
     """
-    print("Start scheduling new appointment...")
+    logger.debug("Scheduling appointment: doctor ID=%s, patient ID=%s, time=%s", appointment.doctor_id, appointment.patient_id, appointment.scheduled_datetime)
     now = datetime.now(timezone.utc)
     scheduled_utc = appointment.scheduled_datetime.astimezone(timezone.utc)
 
-    # Validate future time and working hours
-    print("Validate future time and working hours...")
-    if scheduled_utc < now:
-        raise HTTPException(status_code=400, detail="Appointments must be scheduled for future time slots.")
-    if not (time(9, 0) <= scheduled_utc.time() < time(17, 0)):
-        raise HTTPException(status_code=400, detail="Appointments must be scheduled between 09:00 and 17:00.")
-    
-    # Validate slot alignment (60-minute intervals)
-    print("Validate slot alignment ...")
-    if scheduled_utc.minute != 0 or scheduled_utc.second != 0:
-        raise HTTPException(status_code=400, detail="Appointments must be scheduled on 1 hour intervals (e.g., 09:00, 10:00).")
-
-    if not doctor_exists(db, appointment.doctor_id):
-        raise HTTPException(status_code=404, detail="Doctor not found")
-    if not patient_exists(db, appointment.patient_id):
-        raise HTTPException(status_code=404, detail="Patient not found")
+    # Validate future time, working hours and slot alignment (60-minute intervals)
+    error = slot_time_error(scheduled_utc, now)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
 
     # Ensure the patient is booking for themselves
-    print("Ensure the patient is booking for themselves...")
     if appointment.patient_id != current_patient.id:
         raise HTTPException(status_code=403, detail="Not authorized to book for another patient")
 
-    # Check for existing appointments
-    print("Check for existing appointments...")
-    if patient_has_future_appointment_with_doctor(db, appointment.patient_id, appointment.doctor_id, now):
-        raise HTTPException(
-            status_code=409,
-            detail="You already have a future appointment with this doctor. Please cancel or complete it first."
-        )
-    if not check_patient_available_at_time(db, appointment.patient_id, scheduled_utc):
-        raise HTTPException(status_code=409, detail="You already have an appointment at this time.")
-
     try:
         # Delegate to service layer for creation with locking
-        print("Delegate to service layer for creation with locking...")
+        # Existence and conflict checks run as one query inside the service's transaction
         appointment_data = appointment.model_dump()
-        db_appointment = create_appointment_with_lock(db, appointment_data)
+        appointment_data["scheduled_datetime"] = scheduled_utc.replace(tzinfo=None)  # Stored as naive UTC
+        db_appointment = await create_appointment_with_lock(db, appointment_data, now.replace(tzinfo=None))
         logger.info(f"Appointment created: ID={db_appointment.id}, Doctor={appointment.doctor_id}, Patient={appointment.patient_id}")
         return db_appointment
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.error(f"Error creating appointment: {str(e)}")
         raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
+        # Conflicts are reported by the service as 409s; anything else is a server error
         logger.error(f"Unexpected error creating appointment: {str(e)}")
-        raise HTTPException(status_code=409, detail="Doctor has another appointment at this time")
+        raise HTTPException(status_code=500, detail="Could not create the appointment. Please try again.")
+
+@router.post("/batch", response_model=AppointmentBatchResponse)
+async def book_appointment_batch(
+    batch: AppointmentBatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_patient: dict = Depends(get_current_patient)
+):
+    """
+    Book several appointments in one request: explicit `slots`, a weekly (or every
+    `interval_days`) `recurrence` series, or both (requires patient authentication).
+    mode=all_or_nothing books every slot or none (409 listing the failed slots);
+    mode=best_effort books what it can and lists the rest under `failed`.
+    """
+    if batch.patient_id != current_patient.id:
+        raise HTTPException(status_code=403, detail="Not authorized to book for another patient")
+
+    # Checked before the series is expanded
+    total = len(batch.slots) + (batch.recurrence.occurrences if batch.recurrence else 0)
+    if not total:
+        raise HTTPException(status_code=400, detail="No appointments requested")
+    if total > APPOINTMENT_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"A batch can book at most {APPOINTMENT_BATCH_MAX} appointments")
+
+    requested = [(slot.doctor_id, slot.scheduled_datetime) for slot in batch.slots]
+    if batch.recurrence:
+        series = batch.recurrence
+        try:
+            requested += [
+                (series.doctor_id, series.first_datetime + timedelta(days=series.interval_days * i))
+                for i in range(series.occurrences)
+            ]
+        except OverflowError:
+            raise HTTPException(status_code=400, detail="Recurrence extends past the supported date range")
+
+    now = datetime.now(timezone.utc)
+    all_or_nothing = batch.mode == BookingMode.ALL_OR_NOTHING
+    slots, failed = [], []
+    for doctor_id, scheduled in requested:
+        scheduled_utc = scheduled.astimezone(timezone.utc)
+        error = slot_time_error(scheduled_utc, now)
+        if error:
+            failed.append(batch_failure(doctor_id, scheduled_utc.replace(tzinfo=None), 400, error))
+        else:
+            slots.append((doctor_id, scheduled_utc.replace(tzinfo=None)))  # Stored as naive UTC
+    if failed and all_or_nothing:
+        reject_batch(failed)
+
+    created, rejected = await create_appointment_batch(db, batch.patient_id, slots, all_or_nothing, now.replace(tzinfo=None))
+    logger.info(f"Appointment batch booked for patient ID={batch.patient_id}: {len(created)} of {len(requested)}")
+    return {"created": created, "failed": failed + rejected}
 
 @router.get("/patient/{patient_id}", response_model=List[AppointmentResponseModel])
-def get_patient_appointments(
+async def get_patient_appointments(
     patient_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    status: Optional[AppointmentStatusModel] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: dict = Depends(get_current_patient)
 ):
     """
-    Retrieve all appointments for a patient (requires authentication).
+    Retrieve a patient's appointments, oldest first, one page at a time (requires authentication).
+    Optional filters: status, date_from (inclusive), date_to (exclusive). The next page's cursor is returned in the X-Next-Cursor header.
     """
-    if not patient_exists(db, patient_id):
+    if not await patient_exists(db, patient_id):
         raise HTTPException(status_code=404, detail="Patient not found")
     
     # Restrict access to patient's own appointments unless doctor
     if patient_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view this patient's appointments")
 
-    appointments = get_all_appointments_for_patient(db, patient_id)
+    appointments, next_cursor = await get_appointments_page_for_patient(
+        db, patient_id, cursor, limit,
+        status=status, date_from=as_naive_utc(date_from), date_to=as_naive_utc(date_to)
+    )
+    set_next_cursor(response, next_cursor)
     logger.info(f"Retrieved {len(appointments)} appointments for patient ID={patient_id}")
     return appointments
 
 @router.get("/doctor/{doctor_id}", response_model=List[AppointmentResponseModel])
-def get_doctor_appointments(
+async def get_doctor_appointments(
     doctor_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    status: Optional[AppointmentStatusModel] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
     current_doctor: Doctor = Depends(get_current_doctor)
 ):
     """
-    Retrieve all appointments for a doctor (requires doctor authentication).
+    Retrieve a doctor's appointments, oldest first, one page at a time (requires doctor authentication).
+    Optional filters: status, date_from (inclusive), date_to (exclusive). The next page's cursor is returned in the X-Next-Cursor header.
     """
-    if not doctor_exists(db, doctor_id):
+    if not await doctor_exists(db, doctor_id):
         raise HTTPException(status_code=404, detail="Doctor not found")
     if doctor_id != current_doctor.id:
         raise HTTPException(status_code=403, detail="Not authorized to view this doctor's appointments")
     
-    appointments = get_all_appointments_for_doctor(db, doctor_id)
+    appointments, next_cursor = await get_appointments_page_for_doctor(
+        db, doctor_id, cursor, limit,
+        status=status, date_from=as_naive_utc(date_from), date_to=as_naive_utc(date_to)
+    )
+    set_next_cursor(response, next_cursor)
     logger.info(f"Retrieved {len(appointments)} appointments for doctor ID={doctor_id}")
     return appointments
 
+# Registered before /doctor/{doctor_id}/{date} so "export" is not parsed as a date
+@router.get("/patient/{patient_id}/export")
+async def export_patient_appointments(
+    patient_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[AppointmentStatusModel] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    sessionmaker: async_sessionmaker = Depends(choose_read_sessionmaker),
+    current_user: dict = Depends(get_current_patient)
+):
+    """
+    Stream a patient's full appointment history, oldest first, as NDJSON or CSV (requires authentication).
+    Optional filters: status, date_from (inclusive), date_to (exclusive).
+    """
+    if patient_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to export this patient's appointments")
+
+    return StreamingResponse(
+        stream_appointments_export(
+            format, patient_id=patient_id, sessionmaker=sessionmaker,
+            status=status, date_from=as_naive_utc(date_from), date_to=as_naive_utc(date_to)
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="patient-{patient_id}-appointments.{format}"'}
+    )
+
+@router.get("/doctor/{doctor_id}/export")
+async def export_doctor_appointments(
+    doctor_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[AppointmentStatusModel] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    sessionmaker: async_sessionmaker = Depends(choose_read_sessionmaker),
+    current_doctor: Doctor = Depends(get_current_doctor)
+):
+    """
+    Stream a doctor's full appointment history, oldest first, as NDJSON or CSV (requires doctor authentication).
+    Optional filters: status, date_from (inclusive), date_to (exclusive).
+    """
+    if doctor_id != current_doctor.id:
+        raise HTTPException(status_code=403, detail="Not authorized to export this doctor's appointments")
+
+    return StreamingResponse(
+        stream_appointments_export(
+            format, doctor_id=doctor_id, sessionmaker=sessionmaker,
+            status=status, date_from=as_naive_utc(date_from), date_to=as_naive_utc(date_to)
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="doctor-{doctor_id}-appointments.{format}"'}
+    )
+
 @router.put("/{appointment_id}/cancel", response_model=AppointmentResponseModel)
-def cancel_appointment(
+async def cancel_appointment(
     appointment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_patient)
 ):
     """
     Cancel an existing appointment. (requires authentication).
     """
-    appointment = db.query(AppointmentModel).filter(AppointmentModel.id == appointment_id).first()
+    appointment = await get_appointment_by_id(db, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
@@ -145,22 +274,24 @@ def cancel_appointment(
         raise HTTPException(status_code=400, detail="Can not cancel a completed appointment")
 
     appointment.status = AppointmentStatusModel.CANCELLED
-    db.commit()
-    db.refresh(appointment)
+    await db.commit()
+    await db.refresh(appointment)
+    await mark_slot(appointment.doctor_id, appointment.scheduled_datetime, booked=False)
+    await publish_appointment_event("appointment.cancelled", appointment)
     logger.info(f"Appointment cancelled: ID={appointment_id}")
     return appointment
 
 
 @router.put("/{appointment_id}/complete", response_model=AppointmentResponseModel)
-def complete_appointment(
+async def complete_appointment(
     appointment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_doctor)
 ):
     """
     Mark appointment as complete. This is only availabel for Doctors(requires authentication).
     """
-    appointment = db.query(AppointmentModel).filter(AppointmentModel.id == appointment_id).first()
+    appointment = await get_appointment_by_id(db, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
@@ -181,27 +312,29 @@ def complete_appointment(
         raise HTTPException(status_code=400, detail="Appointment already marked as completed.")
 
     appointment.status = AppointmentStatusModel.COMPLETED
-    db.commit()
-    db.refresh(appointment)
+    await db.commit()
+    await db.refresh(appointment)
+    await publish_appointment_event("appointment.completed", appointment)
     logger.info(f"Appointment marked completed: ID={appointment_id}")
     return appointment
 
 @router.get("/doctor/{doctor_id}/{date}", response_model=List[datetime])
-def get_booked_slots(
+async def get_booked_slots(
     doctor_id: int,
     date: date,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Retrieve booked time slots for a doctor on a given date.
     """
-    print("DATE BOOKED RECIEVED IN BACKED: ", date)
-    if not doctor_exists(db, doctor_id):
+    # A cached bitmap implies the doctor exists; only a miss needs the database
+    bitmap = await read_bitmap(doctor_id, date)
+    if bitmap is None and not await doctor_exists(db, doctor_id):
         raise HTTPException(status_code=404, detail="Doctor not found")
 
     now = datetime.now(timezone.utc)
-    start_time = datetime.combine(date, time(9, 0)).astimezone(timezone.utc)
-    end_time = datetime.combine(date, time(17, 0)).astimezone(timezone.utc)
+    start_time = datetime.combine(date, time(SLOT_START_HOUR, 0)).astimezone(timezone.utc)
+    end_time = datetime.combine(date, time(SLOT_END_HOUR, 0)).astimezone(timezone.utc)
     
     
     if end_time < now:
@@ -211,7 +344,58 @@ def get_booked_slots(
     if start_time < now:
         start_time = now
 
-    booked_slots = set(get_booked_slots_for_doctor(db, doctor_id, start_time, end_time))
-    print("BOOKED TIME SLOTS: ", booked_slots)
+    if bitmap is None:
+        bitmap = await fill_bitmap(db, doctor_id, date)
+    booked_slots = {
+        slot for slot in slots_from_bitmap(date, bitmap)
+        if start_time <= slot.replace(tzinfo=timezone.utc) < end_time
+    }
+    logger.debug("Booked slots for doctor ID=%s on %s: %s", doctor_id, date, sorted(booked_slots))
     logger.info(f"Retrieved {len(booked_slots)} booked slots for doctor ID={doctor_id} on {date}")
-    return booked_slots
\ No newline at end of file
+    return booked_slots
+
+@router.get("/availability", response_model=List[AvailabilityResponse])
+async def search_availability(
+    start_date: date,
+    end_date: Optional[date] = None,
+    specialization_id: Optional[int] = None,
+    specialization: Optional[str] = None,
+    after_doctor_id: int = 0,
+    limit: int = Query(50, ge=1, le=200),
+    stream: bool = False,
+    sessionmaker: async_sessionmaker = Depends(choose_read_sessionmaker),
+):
+    """
+    Free slots for many doctors over a date range (inclusive), optionally filtered by specialization ID or name.
+    Doctors are returned in ID order, `limit` per page; pass the last `doctor_id` as `after_doctor_id` for the next page.
+    With `stream=true` every matching doctor is streamed as NDJSON, one line per doctor.
+    """
+    end_date = end_date or start_date
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days >= AVAILABILITY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {AVAILABILITY_MAX_DAYS} days")
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    if end_date < now.date():
+        raise HTTPException(status_code=400, detail="Cannot retrieve slots for past dates")
+    start_date = max(start_date, now.date())
+
+    if specialization is not None:
+        spec = await specialization_catalog.get_by_name(specialization)
+        if not spec:
+            raise HTTPException(status_code=404, detail=f"Specialization {specialization} not found")
+        specialization_id = spec.id
+    elif specialization_id is not None and not await specialization_catalog.get_by_id(specialization_id):
+        raise HTTPException(status_code=404, detail=f"Specialization with id {specialization_id} not found")
+
+    if stream:
+        return StreamingResponse(
+            stream_availability(start_date, end_date, now, specialization_id, after_doctor_id, limit, sessionmaker),
+            media_type="application/x-ndjson"
+        )
+
+    async with sessionmaker() as db:
+        page = await get_availability_page(db, start_date, end_date, now, specialization_id, after_doctor_id, limit)
+    logger.info(f"Availability search returned {len(page)} doctors for {start_date}..{end_date}")
+    return page
@@ -1,14 +1,19 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import timedelta
 from fastapi.security import OAuth2PasswordRequestForm
-from app.database import get_db
+from app.database import get_async_db
+from app.core.replicas import get_async_read_db
 from app.models.doctor import Doctor
 from app.schemas.doctor import DoctorCreate, DoctorResponse, DoctorUpdate
-from app.utils.helper import get_specialization_by_name, hash_password
-from app.auth import authenticate_user, create_access_token, get_current_doctor, UserType
+from app.utils.helper import get_doctor_by_id, get_doctor_by_email, hash_password_async
+from app.services.specialization_catalog import specialization_catalog
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from app.services.doctor_directory import get_directory_version, bump_directory_version, directory_etag, etag_matches, get_directory_page
+from app.services.bulk_import import import_format, import_records, iter_lines, iter_records, require_import_token
+from app.auth import authenticate_user, create_access_token, invalidate_principal, get_current_doctor, UserType
 import os
 from dotenv import load_dotenv
 
@@ -18,8 +23,6 @@ load_dotenv()
 
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/doctors", tags=["doctors"])
@@ -28,12 +31,12 @@ router = APIRouter(prefix="/doctors", tags=["doctors"])
 @router.post("/login")
 async def doctor_login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     email = form_data.username  # This is the email sent as 'username'
     password = form_data.password
     # Authenticate doctor
-    user = authenticate_user(db, email, password, UserType.DOCTOR)
+    user = await authenticate_user(db, email, password, UserType.DOCTOR)
     if not user:
         raise HTTPException(status_code=400, detail="Invalid email or password")
     
@@ -55,16 +58,16 @@ async def read_doctor_profile(current_doctor: Doctor = Depends(get_current_docto
 
 
 @router.post("/", response_model=DoctorResponse)
-def create_doctor(doctor: DoctorCreate, db: Session = Depends(get_db)):
+async def create_doctor(doctor: DoctorCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new doctor with hashed password.
     """
     # Check if email is already in use
-    if db.query(Doctor).filter(Doctor.email == doctor.email).first():
+    if await get_doctor_by_email(db, doctor.email):
         raise HTTPException(status_code=409, detail="Email already registered")
 
     # Resolve specialization_name to specialization_id
-    specialization = get_specialization_by_name(db, doctor.specialization_name)
+    specialization = await specialization_catalog.get_by_name(doctor.specialization_name)
     if not specialization:
         raise HTTPException(status_code=404, detail="Specialization not found")
 
@@ -74,22 +77,34 @@ def create_doctor(doctor: DoctorCreate, db: Session = Depends(get_db)):
     
     doctor_data["first_name"] = doctor.first_name[0].upper() + doctor.first_name[1:].lower()
     doctor_data["last_name"] = doctor.last_name[0].upper() + doctor.last_name[1:].lower()
-    doctor_data["password"] = hash_password(doctor.password)  # Hash password
+    doctor_data["password"] = await hash_password_async(doctor.password)  # Hash password
 
     # Create and save doctor
     db_doctor = Doctor(**doctor_data)
     db.add(db_doctor)
-    db.commit()
-    db.refresh(db_doctor)
+    await db.commit()
+    await db.refresh(db_doctor)
+    await bump_directory_version()
     logger.info(f"Doctor created: ID={db_doctor.id}, Email={doctor.email}")
     return db_doctor
 
+@router.post("/import", dependencies=[Depends(require_import_token)])
+async def import_doctors(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Bulk-create doctors from an NDJSON (application/x-ndjson) or CSV (text/csv) upload,
+    one record per line. Invalid rows are skipped and reported by line number.
+    Requires the X-Import-Token header.
+    """
+    records = iter_records(iter_lines(request.stream()), import_format(request.headers.get("content-type")))
+    report = await import_records(db, "doctors", records)
+    return report.as_dict()
+
 @router.get("/{doctor_id}", response_model=DoctorResponse)
-def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
+async def get_doctor(doctor_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """
     Retrieve a doctor by ID (requires authentication).
     """
-    doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
+    doctor = await get_doctor_by_id(db, doctor_id)
     # if not doctor:
     #     raise HTTPException(status_code=404, detail="Doctor not found")
     # if doctor.id != current_doctor.id:
@@ -97,23 +112,41 @@ def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
     return doctor
 
 @router.get("/", response_model=List[DoctorResponse])
-def get_all_doctors(db: Session = Depends(get_db)):
+async def get_all_doctors(
+    request: Request,
+    specialization_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Retrieve all doctors (requires authentication).
+    Retrieve doctors ordered by ID, one page at a time, optionally filtered by specialization.
+    The next page's cursor is returned in the X-Next-Cursor header. Pages carry a strong ETag;
+    sending it back in If-None-Match returns 304 until a doctor is created or updated.
     """
-    return db.query(Doctor).all()
+    headers = {"Cache-Control": "no-cache"}
+    version = await get_directory_version()
+    if version is not None:
+        headers["ETag"] = directory_etag(version, specialization_id, cursor, limit)
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+    page = await get_directory_page(db, version, specialization_id, cursor, limit)
+    if page.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return Response(content=page.body, media_type="application/json", headers=headers)
 
 @router.put("/{doctor_id}", response_model=DoctorResponse)
-def update_doctor(
+async def update_doctor(
     doctor_id: int,
     doctor_update: DoctorUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_doctor: Doctor = Depends(get_current_doctor)
 ):
     """
     Update a doctor's details, including password if provided (requires authentication).
     """
-    db_doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
+    db_doctor = await get_doctor_by_id(db, doctor_id)
     if not db_doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     if db_doctor.id != current_doctor.id:
@@ -121,23 +154,25 @@ def update_doctor(
 
     update_data = doctor_update.model_dump(exclude_unset=True)
     if "specialization_name" in update_data:
-        specialization = get_specialization_by_name(db, update_data["specialization_name"])
+        specialization = await specialization_catalog.get_by_name(update_data["specialization_name"])
         if not specialization:
             raise HTTPException(status_code=404, detail="Specialization not found")
         update_data["specialization_id"] = specialization.id
         del update_data["specialization_name"]
 
     if "password" in update_data:
-        update_data["password"] = hash_password(update_data["password"])
+        update_data["password"] = await hash_password_async(update_data["password"])
 
     if "email" in update_data and update_data["email"] != db_doctor.email:
-        if db.query(Doctor).filter(Doctor.email == update_data["email"]).first():
+        if await get_doctor_by_email(db, update_data["email"]):
             raise HTTPException(status_code=409, detail="Email already registered")
 
     for key, value in update_data.items():
         setattr(db_doctor, key, value)
 
-    db.commit()
-    db.refresh(db_doctor)
+    await db.commit()
+    await db.refresh(db_doctor)
+    await invalidate_principal(UserType.DOCTOR, doctor_id)
+    await bump_directory_version()
     logger.info(f"Doctor updated: ID={doctor_id}")
     return db_doctor
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from app.auth import decode_token, UserType
+from app.services.events import broker, EVENT_KEEPALIVE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Public slot events derived from appointment changes
+SLOT_EVENTS = {
+    "appointment.created": "slot.booked",
+    "appointment.cancelled": "slot.released",
+}
+
+
+def client_events(event: dict, user_type: Optional[str], user_id: Optional[int]) -> list[dict]:
+    """What one client may see of an event: slot and directory changes for everyone, appointment details for its parties."""
+    visible = []
+    event_type = event.get("type", "")
+    if event_type in SLOT_EVENTS:
+        visible.append({
+            "type": SLOT_EVENTS[event_type],
+            "doctor_id": event["doctor_id"],
+            "scheduled_datetime": event["scheduled_datetime"],
+        })
+    if event_type.startswith("appointment."):
+        if (user_type == UserType.DOCTOR and event["doctor_id"] == user_id) or \
+           (user_type == UserType.PATIENT and event["patient_id"] == user_id):
+            visible.append(event)
+    elif event_type.startswith("doctors."):
+        visible.append(event)
+    return visible
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/stream")
+async def stream_events(token: Optional[str] = None):
+    """
+    Server-Sent Events stream of slot.booked / slot.released and doctors.changed events.
+    With a valid access token (`?token=`, since EventSource can't send headers) the
+    user's own appointment.created / appointment.cancelled / appointment.completed events are included.
+    """
+    user_type = user_id = None
+    if token:
+        payload = decode_token(token)
+        user_type, user_id = payload.get("user_type"), payload.get("sub")
+        user_id = int(user_id) if user_id else None
+
+    async def stream():
+        queue = broker.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                for visible in client_events(event, user_type, user_id):
+                    yield format_sse(visible)
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
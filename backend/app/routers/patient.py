@@ -1,14 +1,18 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import timedelta
 from pydantic import BaseModel, EmailStr
-from app.database import get_db
+from app.database import get_async_db
+from app.core.replicas import get_async_read_db
 from app.models.patient import Patient
 from app.schemas.patient import PatientCreate, PatientResponse, PatientUpdate
-from app.utils.helper import hash_password
-from app.auth import authenticate_user, create_access_token, get_current_patient, UserType
+from app.utils.helper import get_patient_by_id, get_patient_by_email, hash_password_async
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_page, set_next_cursor
+from app.services.bulk_import import import_format, import_records, iter_lines, iter_records, require_import_token
+from app.auth import authenticate_user, create_access_token, invalidate_principal, get_current_patient, UserType
 from fastapi.security import OAuth2PasswordRequestForm
 import os
 from dotenv import load_dotenv
@@ -18,8 +22,6 @@ load_dotenv()  # Loads variables from a .env file if present
 
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/patients", tags=["patients"])
@@ -29,13 +31,13 @@ router = APIRouter(prefix="/patients", tags=["patients"])
 @router.post("/login")
 async def patient_login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     email = form_data.username  # This is the email sent as 'username'
     password = form_data.password
 
     # Authenticate patient
-    user = authenticate_user(db, email, password, UserType.PATIENT)
+    user = await authenticate_user(db, email, password, UserType.PATIENT)
     if not user:
         raise HTTPException(status_code=400, detail="Invalid email or password")
     
@@ -57,35 +59,46 @@ async def read_patient_profile(current_patient: Patient = Depends(get_current_pa
 
 
 @router.post("/", response_model=PatientResponse)
-def create_patient(patient: PatientCreate, db: Session = Depends(get_db)):
+async def create_patient(patient: PatientCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new patient with hashed password.
     """
     # Check if email is already in use
-    if db.query(Patient).filter(Patient.email == patient.email).first():
+    if await get_patient_by_email(db, patient.email):
         raise HTTPException(status_code=409, detail="Email already registered")
 
     # Prepare patient data
     patient_data = patient.model_dump(exclude={"password", "last_name", "first_name"})
     patient_data["first_name"] = patient.first_name[0].upper() + patient.first_name[1:].lower()
     patient_data["last_name"] = patient.last_name[0].upper() + patient.last_name[1:].lower()
-    patient_data["password"] = hash_password(patient.password)  # Hash password
+    patient_data["password"] = await hash_password_async(patient.password)  # Hash password
     
 
     # Create and save patient
     db_patient = Patient(**patient_data)
     db.add(db_patient)
-    db.commit()
-    db.refresh(db_patient)
+    await db.commit()
+    await db.refresh(db_patient)
     logger.info(f"Patient created: ID={db_patient.id}, Email={patient.email}")
     return db_patient
 
+@router.post("/import", dependencies=[Depends(require_import_token)])
+async def import_patients(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Bulk-create patients from an NDJSON (application/x-ndjson) or CSV (text/csv) upload,
+    one record per line. Invalid rows are skipped and reported by line number.
+    Requires the X-Import-Token header.
+    """
+    records = iter_records(iter_lines(request.stream()), import_format(request.headers.get("content-type")))
+    report = await import_records(db, "patients", records)
+    return report.as_dict()
+
 @router.get("/{patient_id}", response_model=PatientResponse)
-def get_patient(patient_id: int, db: Session = Depends(get_db), ):
+async def get_patient(patient_id: int, db: AsyncSession = Depends(get_async_read_db), ):
     """
     Retrieve a patient by ID (requires authentication).
     """
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    patient = await get_patient_by_id(db, patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     # if patient.id != current_patient.id:
@@ -93,23 +106,32 @@ def get_patient(patient_id: int, db: Session = Depends(get_db), ):
     return patient
 
 @router.get("/", response_model=List[PatientResponse])
-def get_all_patients(db: Session = Depends(get_db), current_patient: Patient = Depends(get_current_patient)):
+async def get_all_patients(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_patient: Patient = Depends(get_current_patient)
+):
     """
-    Retrieve all patients (requires authentication).
+    Retrieve patients ordered by ID, one page at a time (requires authentication).
+    The next page's cursor is returned in the X-Next-Cursor header.
     """
-    return db.query(Patient).all()
+    patients, next_cursor = await fetch_page(db, select(Patient), [Patient.id], cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return patients
 
 @router.put("/{patient_id}", response_model=PatientResponse)
-def update_patient(
+async def update_patient(
     patient_id: int,
     patient_update: PatientUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_patient: Patient = Depends(get_current_patient)
 ):
     """
     Update a patient's details, including password if provided (requires authentication).
     """
-    db_patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    db_patient = await get_patient_by_id(db, patient_id)
     if not db_patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     if db_patient.id != current_patient.id:
@@ -117,16 +139,17 @@ def update_patient(
 
     update_data = patient_update.model_dump(exclude_unset=True)
     if "password" in update_data:
-        update_data["password"] = hash_password(update_data["password"])
+        update_data["password"] = await hash_password_async(update_data["password"])
 
     if "email" in update_data and update_data["email"] != db_patient.email:
-        if db.query(Patient).filter(Patient.email == update_data["email"]).first():
+        if await get_patient_by_email(db, update_data["email"]):
             raise HTTPException(status_code=409, detail="Email already registered")
 
     for key, value in update_data.items():
         setattr(db_patient, key, value)
 
-    db.commit()
-    db.refresh(db_patient)
+    await db.commit()
+    await db.refresh(db_patient)
+    await invalidate_principal(UserType.PATIENT, patient_id)
     logger.info(f"Patient updated: ID={patient_id}")
     return db_patient
\ No newline at end of file
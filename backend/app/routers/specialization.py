@@ -1,12 +1,7 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.specialization import Specialization as SpecializationModel
+from fastapi import APIRouter, HTTPException
 # from schemas.specialization import SpecializationCreate as SpecializationCreateSchema
 from app.schemas.specialization import Specialization as SpecializationSchema
-from app.utils.helper import get_specialization_by_id_or_404
-from app.models.specialization import Specialization as SpecializationModel
-from app.schemas.specialization import Specialization as SpecializationSchema
+from app.services.specialization_catalog import specialization_catalog
 
 router = APIRouter(prefix="/specializations", tags=["specializations"])
 
@@ -33,18 +28,19 @@ router = APIRouter(prefix="/specializations", tags=["specializations"])
 #     return db_spec
 
 @router.get("/", response_model=list[SpecializationSchema])
-def get_all_specializations(
+async def get_all_specializations(
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = 100
 ):
     """Get all specializations with pagination. Adding specialization is reserved for admins"""
-    return db.query(SpecializationModel).order_by(SpecializationModel.name.asc()).offset(skip).limit(limit).all()
+    return await specialization_catalog.list_specializations(skip, limit)
 
 @router.get("/{specialization_id}", response_model=SpecializationSchema)
-def get_specialization(
-    specialization_id: int,
-    db: Session = Depends(get_db)
+async def get_specialization(
+    specialization_id: int
 ):
     """Get a specialization by ID."""
-    return get_specialization_by_id_or_404(db, specialization_id)
+    spec = await specialization_catalog.get_by_id(specialization_id)
+    if not spec:
+        raise HTTPException(status_code=404, detail=f"Specialization with id {specialization_id} not found")
+    return spec
@@ -1,7 +1,16 @@
+import os
 from datetime import datetime
-from pydantic import BaseModel
+from enum import Enum
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
 from typing import Optional
 
+
+load_dotenv()
+
+# Most slots one batch or recurring series may book
+APPOINTMENT_BATCH_MAX = int(os.getenv("APPOINTMENT_BATCH_MAX", "52"))
+
 class Appointment(BaseModel):
     doctor_id: int
     patient_id: int
@@ -25,3 +34,32 @@ class AppointmentResponse(Appointment):
 class AvailabilityResponse(BaseModel):
     doctor_id: int
     available_slots: list[datetime]
+
+
+class BookingMode(str, Enum):
+    ALL_OR_NOTHING = "all_or_nothing"
+    BEST_EFFORT = "best_effort"
+
+class AppointmentSlot(BaseModel):
+    doctor_id: int
+    scheduled_datetime: datetime
+
+class AppointmentRecurrence(BaseModel):
+    doctor_id: int
+    first_datetime: datetime
+    interval_days: int = Field(7, ge=1, le=90, description='Days between appointments')
+    occurrences: int = Field(..., ge=1, le=APPOINTMENT_BATCH_MAX, description='Number of appointments in the series')
+
+class AppointmentBatchCreate(BaseModel):
+    patient_id: int
+    mode: BookingMode = BookingMode.ALL_OR_NOTHING
+    slots: list[AppointmentSlot] = Field([], max_length=APPOINTMENT_BATCH_MAX)
+    recurrence: Optional[AppointmentRecurrence] = None
+
+class AppointmentBatchFailure(AppointmentSlot):
+    status_code: int
+    detail: str
+
+class AppointmentBatchResponse(BaseModel):
+    created: list[AppointmentResponse]
+    failed: list[AppointmentBatchFailure]
@@ -0,0 +1,82 @@
+"""
+Streaming export of a doctor's or patient's appointment history.
+
+Rows are read with a server-side cursor (`AsyncSession.stream`) in batches of
+APPOINTMENT_EXPORT_BATCH_SIZE and written out one batch at a time, so memory
+stays flat however long the history is. Only plain columns are selected; no
+ORM objects or response models are built.
+"""
+import csv
+import io
+import json
+import logging
+import os
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database import AsyncSessionLocal
+from app.models.appointment import Appointment as AppointmentModel, AppointmentStatus as AppointmentStatusModel
+from app.utils.helper import filter_appointments
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+APPOINTMENT_EXPORT_BATCH_SIZE = int(os.getenv("APPOINTMENT_EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = ["id", "doctor_id", "patient_id", "scheduled_datetime", "status", "created_at", "updated_at"]
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, AppointmentStatusModel):
+        return value.value
+    return value
+
+def format_batch(rows: list, fmt: str) -> str:
+    """Render one batch of rows as NDJSON lines or CSV records."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([["" if v is None else export_value(v) for v in row] for row in rows])
+        return buffer.getvalue()
+    return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, map(export_value, row)))) + "\n" for row in rows)
+
+
+async def stream_appointments_export(
+    fmt: str,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+    batch_size: int = APPOINTMENT_EXPORT_BATCH_SIZE,
+    sessionmaker: async_sessionmaker = AsyncSessionLocal,
+    **filters,
+) -> AsyncIterator[str]:
+    """
+    Yield a doctor's or patient's appointments, ordered by time, as NDJSON or CSV chunks.
+    Uses its own session (from `sessionmaker`) since the response outlives the request's dependencies.
+    """
+    query = select(*(getattr(AppointmentModel, column) for column in EXPORT_COLUMNS))
+    if doctor_id is not None:
+        query = query.where(AppointmentModel.doctor_id == doctor_id)
+    if patient_id is not None:
+        query = query.where(AppointmentModel.patient_id == patient_id)
+    query = filter_appointments(query, **filters).order_by(AppointmentModel.scheduled_datetime, AppointmentModel.id)
+
+    if fmt == "csv":
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+
+    exported = 0
+    async with sessionmaker() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            exported += len(rows)
+            yield format_batch(rows, fmt)
+    logger.info(f"Exported {exported} appointments (doctor={doctor_id}, patient={patient_id}, format={fmt})")
@@ -1,52 +1,383 @@
 import logging
-from sqlalchemy.orm import Session
+import os
+from dotenv import load_dotenv
+from sqlalchemy import select, insert, exists, literal, and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime
 from fastapi import HTTPException
+from redis import RedisError
 
 from app.models.appointment import Appointment as AppointmentModel, AppointmentStatus as AppointmentStatusModel
-from app.utils.helper import check_doctor_availability, check_patient_available_at_time
-from app.core.redis import acquire_doctor_lock, release_doctor_lock, acquire_patient_lock, release_patient_lock
+from app.models.doctor import Doctor as DoctorModel
+from app.models.patient import Patient as PatientModel
+from app.core.metrics import BOOKING_LOCK_FALLBACKS
+from app.core.redis import REDIS_BREAKER_RESET_SECONDS, acquire_slot_locks, release_slot_locks, acquire_locks, acquire_lock_groups, release_locks, slot_lock_keys
+from app.services.slot_index import mark_slot
+from app.services.events import publish_appointment_event
+
+load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_appointment_with_lock(db: Session, appointment_data: dict) -> AppointmentModel:
+# redis: serialize bookings of a slot with Redis locks, then validate and insert.
+# database: no locks; the unique doctor-slot and patient-slot indexes reject conflicts.
+BOOKING_LOCK_MODE = os.getenv("BOOKING_LOCK_MODE", "redis").lower()
+# With redis locks, what bookings do while Redis is down: database (book without locks,
+# as in database mode) or reject (503 until Redis is back)
+REDIS_LOCK_FALLBACK = os.getenv("REDIS_LOCK_FALLBACK", "database").lower()
+
+
+async def validate_booking(db: AsyncSession, doctor_id: int, patient_id: int, scheduled_datetime: datetime, now: datetime) -> None:
+    """
+    Check every booking constraint in a single round trip, raising the matching HTTP error.
+    """
+    live = AppointmentModel.status != AppointmentStatusModel.CANCELLED
+    checks = select(
+        exists().where(DoctorModel.id == doctor_id).label("doctor_exists"),
+        exists().where(PatientModel.id == patient_id).label("patient_exists"),
+        exists().where(
+            AppointmentModel.patient_id == patient_id,
+            AppointmentModel.doctor_id == doctor_id,
+            AppointmentModel.scheduled_datetime >= now,
+            AppointmentModel.status.not_in([AppointmentStatusModel.CANCELLED, AppointmentStatusModel.COMPLETED])
+        ).label("has_future_with_doctor"),
+        exists().where(
+            AppointmentModel.patient_id == patient_id,
+            AppointmentModel.scheduled_datetime == scheduled_datetime,
+            live
+        ).label("patient_busy"),
+        exists().where(
+            AppointmentModel.doctor_id == doctor_id,
+            AppointmentModel.scheduled_datetime >= scheduled_datetime - timedelta(minutes=30),
+            AppointmentModel.scheduled_datetime < scheduled_datetime + timedelta(minutes=30),
+            live
+        ).label("doctor_busy"),
+    )
+    result = (await db.execute(checks)).one()
+
+    if not result.doctor_exists:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    if not result.patient_exists:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    if result.has_future_with_doctor:
+        raise HTTPException(
+            status_code=409,
+            detail="You already have a future appointment with this doctor. Please cancel or complete it first."
+        )
+    if result.patient_busy:
+        raise HTTPException(status_code=409, detail="You already have an appointment at this time.")
+    if result.doctor_busy:
+        raise HTTPException(status_code=409, detail="Doctor has a conflicting appointment.")
+
+
+def lock_fallback(error: Exception) -> None:
+    """Redis locks are unavailable: raise 503 (REDIS_LOCK_FALLBACK=reject), or return to book without them."""
+    BOOKING_LOCK_FALLBACKS.labels(REDIS_LOCK_FALLBACK).inc()
+    if REDIS_LOCK_FALLBACK != "database":
+        logger.warning(f"Redis locks unavailable, rejecting booking: {error}")
+        raise HTTPException(
+            status_code=503,
+            detail="Booking is temporarily unavailable. Please try again shortly.",
+            headers={"Retry-After": str(int(REDIS_BREAKER_RESET_SECONDS))},
+        )
+    logger.warning(f"Redis locks unavailable, booking with the unique slot indexes only: {error}")
+
+
+async def create_appointment_with_lock(db: AsyncSession, appointment_data: dict, now: datetime) -> AppointmentModel:
     """
     Create an appointment with Redis locking to prevent double-booking.
+
+    Validation and insert run in one transaction; the unique doctor-slot index
+    rejects anything that slips past the lock. With BOOKING_LOCK_MODE=database, or
+    while Redis is down and REDIS_LOCK_FALLBACK=database, the booking is a single
+    guarded insert instead (see create_appointment_reserved).
     """
+    if BOOKING_LOCK_MODE == "database":
+        return await create_appointment_reserved(db, appointment_data, now)
+
     scheduled_datetime = appointment_data["scheduled_datetime"]
     doctor_id = appointment_data["doctor_id"]
     patient_id = appointment_data["patient_id"]
 
-    # Acquire locks for doctor and patient
-    if not acquire_doctor_lock(doctor_id, scheduled_datetime):
-        logger.warning(f"Failed to acquire doctor lock for doctor ID={doctor_id}, time={scheduled_datetime}")
-        raise HTTPException(status_code=409, detail="Doctor is already booked at this time.")
-    if not acquire_patient_lock(patient_id, scheduled_datetime):
-        release_doctor_lock(doctor_id, scheduled_datetime)
-        logger.warning(f"Failed to acquire patient lock for patient ID={patient_id}, time={scheduled_datetime}")
-        raise HTTPException(status_code=409, detail="Patient is already booked at this time.")
+    # Acquire the doctor's and patient's locks together (atomic, non-blocking retries)
+    try:
+        lock_token = await acquire_slot_locks(doctor_id, patient_id, scheduled_datetime)
+    except RedisError as e:
+        lock_fallback(e)
+        return await create_appointment_reserved(db, appointment_data, now)
+    if not lock_token:
+        logger.warning(f"Failed to acquire slot locks for doctor ID={doctor_id}, patient ID={patient_id}, time={scheduled_datetime}")
+        raise HTTPException(status_code=409, detail="This time slot is being booked by another request. Please try again.")
 
     try:
-        # Check for conflicts using helper functions
-        start_time = scheduled_datetime - timedelta(minutes=30)
-        end_time = scheduled_datetime + timedelta(minutes=30)
-        if not check_doctor_availability(db, doctor_id, start_time, end_time):
-            raise HTTPException(status_code=409, detail="Doctor has a conflicting appointment.")
-        if not check_patient_available_at_time(db, patient_id, scheduled_datetime):
-            raise HTTPException(status_code=409, detail="Patient has a conflicting appointment.")
-
-        # Create and save appointment
-        appointment = AppointmentModel(**appointment_data)
+        await validate_booking(db, doctor_id, patient_id, scheduled_datetime, now)
+
+        # Create and save appointment. created_at is set here so no refresh query is needed.
+        appointment = AppointmentModel(**appointment_data, created_at=now.replace(microsecond=0))
         db.add(appointment)
-        db.commit()
-        db.refresh(appointment)
+        await db.commit()
+        await mark_slot(doctor_id, scheduled_datetime, booked=True)
+        await publish_appointment_event("appointment.created", appointment)
         logger.info(f"Appointment created in service layer: ID={appointment.id}, Doctor={doctor_id}, Patient={patient_id}")
         return appointment
+    except IntegrityError:
+        await db.rollback()
+        logger.warning(f"Unique slot index rejected booking for doctor ID={doctor_id}, time={scheduled_datetime}")
+        raise HTTPException(status_code=409, detail="Doctor is already booked at this time.")
+    except HTTPException:
+        # Booking rule violations (404 / 409) are expected outcomes, not errors
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error creating appointment in service layer: {str(e)}")
+        raise
+    finally:
+        await release_slot_locks(doctor_id, patient_id, scheduled_datetime, lock_token)
+
+
+async def create_appointment_reserved(db: AsyncSession, appointment_data: dict, now: datetime) -> AppointmentModel:
+    """
+    Create an appointment with one INSERT ... SELECT and no Redis locks.
+
+    The unique doctor-slot and patient-slot indexes reject a taken slot, and the
+    statement's WHERE clause covers the rules they can't express (doctor and patient
+    exist, no other future appointment with this doctor). Slots are on the hour, so
+    the doctor index is as strict as validate_booking's 30-minute window. Only a
+    rejected booking costs a second query, to report which rule it broke.
+    """
+    scheduled_datetime = appointment_data["scheduled_datetime"]
+    doctor_id = appointment_data["doctor_id"]
+    patient_id = appointment_data["patient_id"]
+    created_at = now.replace(microsecond=0)
+
+    guarded = select(
+        DoctorModel.id,
+        literal(patient_id),
+        literal(scheduled_datetime, AppointmentModel.scheduled_datetime.type),
+        literal(AppointmentStatusModel.SCHEDULED, AppointmentModel.status.type),
+        literal(created_at, AppointmentModel.created_at.type),
+    ).where(
+        DoctorModel.id == doctor_id,
+        exists().where(PatientModel.id == patient_id),
+        ~exists().where(
+            AppointmentModel.patient_id == patient_id,
+            AppointmentModel.doctor_id == doctor_id,
+            AppointmentModel.scheduled_datetime >= now,
+            AppointmentModel.status.not_in([AppointmentStatusModel.CANCELLED, AppointmentStatusModel.COMPLETED])
+        ),
+    )
+    statement = insert(AppointmentModel).from_select(
+        ["doctor_id", "patient_id", "scheduled_datetime", "status", "created_at"], guarded
+    )
+    try:
+        result = await db.execute(statement)
+        if result.rowcount == 1:
+            await db.commit()
+        else:
+            await db.rollback()
+    except IntegrityError:
+        await db.rollback()
+        logger.warning(f"Unique slot index rejected booking for doctor ID={doctor_id}, patient ID={patient_id}, time={scheduled_datetime}")
+        await validate_booking(db, doctor_id, patient_id, scheduled_datetime, now)
+        # The conflicting booking was cancelled in the meantime
+        raise HTTPException(status_code=409, detail="This time slot was just booked by another request. Please try again.")
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
+        await db.rollback()
         logger.error(f"Error creating appointment in service layer: {str(e)}")
         raise
+
+    if result.rowcount != 1:
+        # A guard failed; validate_booking names it
+        await validate_booking(db, doctor_id, patient_id, scheduled_datetime, now)
+        raise HTTPException(status_code=409, detail="This time slot was just booked by another request. Please try again.")
+
+    appointment = AppointmentModel(
+        id=result.lastrowid,
+        doctor_id=doctor_id,
+        patient_id=patient_id,
+        scheduled_datetime=scheduled_datetime,
+        status=AppointmentStatusModel.SCHEDULED,
+        created_at=created_at,
+    )
+    await mark_slot(doctor_id, scheduled_datetime, booked=True)
+    await publish_appointment_event("appointment.created", appointment)
+    logger.info(f"Appointment created in service layer: ID={appointment.id}, Doctor={doctor_id}, Patient={patient_id}")
+    return appointment
+
+
+def batch_failure(doctor_id: int, scheduled_datetime: datetime, status_code: int, detail: str) -> dict:
+    return {
+        "doctor_id": doctor_id,
+        "scheduled_datetime": scheduled_datetime.isoformat(),
+        "status_code": status_code,
+        "detail": detail,
+    }
+
+def reject_batch(failed: list[dict]) -> None:
+    """All-or-nothing batches fail as a whole, listing every slot that could not be booked."""
+    raise HTTPException(status_code=409, detail={"message": "No appointments were booked.", "failed": failed})
+
+
+async def find_batch_conflicts(db: AsyncSession, patient_id: int, slots: list[tuple[int, datetime]], now: datetime) -> dict:
+    """
+    Check a batch of slots for one patient, returning {slot: (status_code, detail)} for the
+    ones that cannot be booked. Doctors are looked up in one query and every existing booking
+    that could conflict is fetched in a second one, instead of one validate_booking per slot.
+    """
+    doctor_ids = {doctor_id for doctor_id, _ in slots}
+    known_doctors = set((await db.execute(select(DoctorModel.id).where(DoctorModel.id.in_(doctor_ids)))).scalars().all())
+
+    window = timedelta(minutes=30)
+    rows = (await db.execute(
+        select(
+            AppointmentModel.doctor_id,
+            AppointmentModel.patient_id,
+            AppointmentModel.scheduled_datetime,
+            AppointmentModel.status
+        ).where(
+            AppointmentModel.status != AppointmentStatusModel.CANCELLED,
+            or_(
+                # The patient's bookings at the requested times, or future ones with the requested doctors
+                and_(
+                    AppointmentModel.patient_id == patient_id,
+                    or_(
+                        AppointmentModel.scheduled_datetime.in_([scheduled for _, scheduled in slots]),
+                        and_(
+                            AppointmentModel.doctor_id.in_(doctor_ids),
+                            AppointmentModel.scheduled_datetime >= now,
+                            AppointmentModel.status != AppointmentStatusModel.COMPLETED
+                        )
+                    )
+                ),
+                # The doctors' bookings within 30 minutes of a requested slot
+                *(
+                    and_(
+                        AppointmentModel.doctor_id == doctor_id,
+                        AppointmentModel.scheduled_datetime >= scheduled - window,
+                        AppointmentModel.scheduled_datetime < scheduled + window
+                    )
+                    for doctor_id, scheduled in slots
+                )
+            )
+        )
+    )).all()
+
+    own = [row for row in rows if row.patient_id == patient_id]
+    patient_times = {row.scheduled_datetime for row in own}
+    future_doctors = {
+        row.doctor_id for row in own
+        if row.scheduled_datetime >= now and row.status != AppointmentStatusModel.COMPLETED
+    }
+
+    conflicts = {}
+    for doctor_id, scheduled in slots:
+        if doctor_id not in known_doctors:
+            conflicts[(doctor_id, scheduled)] = (404, "Doctor not found")
+        elif doctor_id in future_doctors:
+            conflicts[(doctor_id, scheduled)] = (409, "You already have a future appointment with this doctor. Please cancel or complete it first.")
+        elif scheduled in patient_times:
+            conflicts[(doctor_id, scheduled)] = (409, "You already have an appointment at this time.")
+        elif any(row.doctor_id == doctor_id and abs(row.scheduled_datetime - scheduled) < window for row in rows):
+            conflicts[(doctor_id, scheduled)] = (409, "Doctor has a conflicting appointment.")
+    return conflicts
+
+
+async def create_appointment_batch(
+    db: AsyncSession,
+    patient_id: int,
+    slots: list[tuple[int, datetime]],
+    all_or_nothing: bool,
+    now: datetime
+) -> tuple[list[AppointmentModel], list[dict]]:
+    """
+    Book several (doctor_id, naive UTC datetime) slots for one patient in one go: one atomic
+    Redis step takes every slot's locks (none in database mode or the Redis-down fallback), one conflict
+    check covers the whole batch and the appointments are inserted in a single transaction.
+
+    All-or-nothing raises 409 listing the failed slots if any slot fails; best-effort books
+    the slots it can and returns the rest as failures. The one-future-appointment-per-doctor
+    rule applies to existing bookings, so a series may hold several slots with one doctor.
+    """
+    failed = []
+    candidates = []
+    seen_times = set()
+    for doctor_id, scheduled in slots:
+        if scheduled in seen_times:
+            failed.append(batch_failure(doctor_id, scheduled, 409, "Duplicate time in this request."))
+            continue
+        seen_times.add(scheduled)
+        candidates.append((doctor_id, scheduled))
+    if all_or_nothing and failed:
+        reject_batch(failed)
+
+    # Take every slot's doctor and patient locks in one atomic step
+    groups = [slot_lock_keys(doctor_id, patient_id, scheduled) for doctor_id, scheduled in candidates]
+    try:
+        if BOOKING_LOCK_MODE == "database":
+            # No locks: the unique slot indexes reject conflicts and the IntegrityError retry below names them
+            lock_token, locked = None, candidates
+        elif all_or_nothing:
+            lock_token = await acquire_locks([key for group in groups for key in group])
+            if not lock_token:
+                logger.warning(f"Failed to acquire batch locks for patient ID={patient_id}")
+                raise HTTPException(status_code=409, detail="One or more time slots are being booked by another request. Please try again.")
+            locked = candidates
+        else:
+            lock_token, acquired = await acquire_lock_groups(groups)
+            locked = [slot for slot, ok in zip(candidates, acquired) if ok]
+            failed += [
+                batch_failure(doctor_id, scheduled, 409, "This time slot is being booked by another request. Please try again.")
+                for (doctor_id, scheduled), ok in zip(candidates, acquired) if not ok
+            ]
+    except RedisError as e:
+        lock_fallback(e)
+        lock_token, locked = None, candidates
+
+    locked_keys = [key for doctor_id, scheduled in locked for key in slot_lock_keys(doctor_id, patient_id, scheduled)] if lock_token else []
+    created = []
+    try:
+        for attempt in range(2):
+            conflicts = await find_batch_conflicts(db, patient_id, locked, now) if locked else {}
+            rejected = [batch_failure(d, t, *conflicts[(d, t)]) for d, t in locked if (d, t) in conflicts]
+            if all_or_nothing and rejected:
+                reject_batch(rejected)
+
+            bookable = [slot for slot in locked if slot not in conflicts]
+            appointments = [
+                AppointmentModel(doctor_id=doctor_id, patient_id=patient_id, scheduled_datetime=scheduled, created_at=now.replace(microsecond=0))
+                for doctor_id, scheduled in bookable
+            ]
+            try:
+                db.add_all(appointments)
+                await db.commit()
+            except IntegrityError:
+                # A slot was taken without our locks; the retry's conflict check names it
+                await db.rollback()
+                logger.warning(f"Unique slot index rejected batch booking for patient ID={patient_id}")
+                if all_or_nothing or attempt:
+                    raise HTTPException(status_code=409, detail="Doctor is already booked at this time.")
+                continue
+            failed += rejected
+            created = appointments
+            break
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error creating appointment batch in service layer: {str(e)}")
+        raise
     finally:
-        release_doctor_lock(doctor_id, scheduled_datetime)
-        release_patient_lock(patient_id, scheduled_datetime)
\ No newline at end of file
+        if locked_keys:
+            await release_locks(locked_keys, lock_token)
+
+    for appointment in created:
+        await mark_slot(appointment.doctor_id, appointment.scheduled_datetime, booked=True)
+        await publish_appointment_event("appointment.created", appointment)
+    logger.info(f"Appointment batch for patient ID={patient_id}: {len(created)} created, {len(failed)} failed")
+    return created, failed
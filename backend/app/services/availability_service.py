@@ -0,0 +1,90 @@
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, Optional
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database import AsyncSessionLocal
+from app.models.doctor import Doctor as DoctorModel
+from app.schemas.appointment import AvailabilityResponse
+from app.services.slot_index import SLOT_START_HOUR, SLOT_END_HOUR
+from app.utils.helper import get_booked_slots_for_doctors
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Longest date range a single availability search may cover
+AVAILABILITY_MAX_DAYS = int(os.getenv("AVAILABILITY_MAX_DAYS", "31"))
+
+
+def free_slots(start_date: date, end_date: date, booked: list[datetime], now: datetime) -> list[datetime]:
+    """All future hourly slots from start_date to end_date (inclusive) that are not booked."""
+    taken = set(booked)
+    slots = []
+    day = start_date
+    while day <= end_date:
+        for hour in range(SLOT_START_HOUR, SLOT_END_HOUR):
+            slot = datetime.combine(day, time(hour))
+            if slot >= now and slot not in taken:
+                slots.append(slot)
+        day += timedelta(days=1)
+    return slots
+
+
+async def get_availability_page(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
+    now: datetime,
+    specialization_id: Optional[int] = None,
+    after_doctor_id: int = 0,
+    limit: int = 50,
+) -> list[AvailabilityResponse]:
+    """
+    Free slots for the next `limit` doctors (ordered by ID, after `after_doctor_id`).
+    Two queries per page regardless of the number of doctors or days.
+    """
+    query = select(DoctorModel.id).where(DoctorModel.id > after_doctor_id)
+    if specialization_id is not None:
+        query = query.where(DoctorModel.specialization_id == specialization_id)
+    doctor_ids = list((await db.execute(query.order_by(DoctorModel.id).limit(limit))).scalars().all())
+
+    booked = await get_booked_slots_for_doctors(
+        db,
+        doctor_ids,
+        datetime.combine(start_date, time(SLOT_START_HOUR)),
+        datetime.combine(end_date, time(SLOT_END_HOUR)),
+    )
+    return [
+        AvailabilityResponse(doctor_id=doctor_id, available_slots=free_slots(start_date, end_date, booked[doctor_id], now))
+        for doctor_id in doctor_ids
+    ]
+
+
+async def stream_availability(
+    start_date: date,
+    end_date: date,
+    now: datetime,
+    specialization_id: Optional[int] = None,
+    after_doctor_id: int = 0,
+    batch_size: int = 50,
+    sessionmaker: async_sessionmaker = AsyncSessionLocal,
+) -> AsyncIterator[str]:
+    """
+    Yield one NDJSON line per doctor for every matching doctor, fetched `batch_size` at a time.
+    Uses its own session (from `sessionmaker`) since the response outlives the request's dependencies.
+    """
+    async with sessionmaker() as db:
+        while True:
+            page = await get_availability_page(db, start_date, end_date, now, specialization_id, after_doctor_id, batch_size)
+            for item in page:
+                yield item.model_dump_json() + "\n"
+            if len(page) < batch_size:
+                break
+            after_doctor_id = page[-1].doctor_id
+            # Don't hold a connection between batches while the client reads
+            await db.commit()
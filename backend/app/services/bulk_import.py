@@ -0,0 +1,297 @@
+"""
+Bulk import of doctors and patients from NDJSON or CSV (one record per line).
+
+Records are validated with the same DoctorCreate / PatientCreate schemas as the
+single-record endpoints and processed in batches: one query checks the batch's
+emails, passwords are hashed in parallel on the bcrypt pool, and the batch is
+written with a single executemany INSERT and commit. Rows that fail are
+reported by line number and skipped; the rest of the file is still imported.
+
+CLI (from backend/):
+    python -m app.services.bulk_import doctors doctors.ndjson
+    python -m app.services.bulk_import patients patients.csv --batch-size 1000
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import secrets
+from typing import AsyncIterator, Iterable, Optional
+from dotenv import load_dotenv
+from fastapi import Header, HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.password_pool import PASSWORD_HASH_WORKERS, run_password_jobs
+from app.models.doctor import Doctor as DoctorModel
+from app.models.patient import Patient as PatientModel
+from app.schemas.doctor import DoctorCreate
+from app.schemas.patient import PatientCreate
+from app.services.doctor_directory import bump_directory_version
+from app.services.specialization_catalog import specialization_catalog
+from app.utils.helper import hash_password
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "500"))
+# Per-row errors kept in the report; later ones are only counted
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+# bcrypt workers an API import may occupy, so logins keep the rest
+BULK_IMPORT_HASH_CONCURRENCY = int(os.getenv("BULK_IMPORT_HASH_CONCURRENCY", str(max(1, PASSWORD_HASH_WORKERS // 2))))
+# Shared secret for the import endpoints; they are disabled while it is unset
+BULK_IMPORT_TOKEN = os.getenv("BULK_IMPORT_TOKEN")
+
+IMPORT_KINDS = {
+    "doctors": (DoctorCreate, DoctorModel),
+    "patients": (PatientCreate, PatientModel),
+}
+
+
+class ImportReport:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.received = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def fail(self, line: int, errors: list, email: Optional[str] = None) -> None:
+        self.failed += 1
+        if len(self.errors) < BULK_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "email": email, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "received": self.received,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+# -------------------- Parsing ----------------------------
+
+def decode_line(line: bytes) -> Optional[str]:
+    try:
+        return line.decode("utf-8-sig").rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    """
+    Split a byte stream into decoded lines without reading it all into memory.
+    Lines that aren't valid UTF-8 are yielded as None.
+    """
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield decode_line(line)
+    if pending:
+        yield decode_line(pending)
+
+async def iter_records(lines: AsyncIterator[Optional[str]], fmt: str) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, record, parse error) for every non-empty line."""
+    header = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if line is None:
+            yield line_number, None, "invalid UTF-8"
+            continue
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield line_number, None, f"expected {len(header)} columns, got {len(values)}"
+                continue
+            # Empty CSV cells mean "not provided"
+            yield line_number, {k: v for k, v in zip(header, values) if v != ""}, None
+        else:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "expected a JSON object"
+                continue
+            yield line_number, record, None
+
+
+def import_format(content_type: Optional[str]) -> str:
+    """Pick the parser from the upload's Content-Type (NDJSON unless it says CSV)."""
+    return "csv" if content_type and content_type.split(";")[0].strip().lower() == "text/csv" else "ndjson"
+
+
+# -------------------- Import ----------------------------
+
+def capitalize(name: str) -> str:
+    return name[0].upper() + name[1:].lower()
+
+async def prepare_row(kind: str, record) -> tuple[Optional[dict], Optional[str]]:
+    """Turn a validated record into an insert row (without password), or an error."""
+    data = record.model_dump(exclude={"password", "specialization_name"})
+    data["first_name"] = capitalize(record.first_name)
+    data["last_name"] = capitalize(record.last_name)
+    if kind == "doctors":
+        specialization = await specialization_catalog.get_by_name(record.specialization_name)
+        if not specialization:
+            return None, "Specialization not found"
+        data["specialization_id"] = specialization.id
+    return data, None
+
+async def existing_emails(db: AsyncSession, model, emails: Iterable[str]) -> set[str]:
+    """The given emails already registered, lowercased (MySQL compares them case-insensitively)."""
+    emails = list(emails)
+    if not emails:
+        return set()
+    result = await db.execute(select(model.email).where(model.email.in_(emails)))
+    return {email.lower() for email in result.scalars().all()}
+
+async def import_batch(db: AsyncSession, kind: str, batch: list[tuple[int, object]], report: ImportReport, hash_concurrency: int) -> None:
+    """Check, hash and insert one batch of validated records."""
+    model = IMPORT_KINDS[kind][1]
+    taken = await existing_emails(db, model, (record.email for _, record in batch))
+
+    rows, lines = [], []
+    for line, record in batch:
+        if record.email.lower() in taken:
+            report.fail(line, ["Email already registered"], record.email)
+            continue
+        row, error = await prepare_row(kind, record)
+        if error:
+            report.fail(line, [error], record.email)
+            continue
+        rows.append(row)
+        lines.append((line, record))
+    if not rows:
+        return
+
+    hashes = await run_password_jobs("hash", hash_password, [(record.password,) for _, record in lines], hash_concurrency)
+    for row, password in zip(rows, hashes):
+        row["password"] = password
+
+    try:
+        await db.execute(insert(model), rows)
+        await db.commit()
+    except IntegrityError:
+        # Someone registered one of these emails since the check; drop those rows and retry once
+        await db.rollback()
+        taken = await existing_emails(db, model, (row["email"] for row in rows))
+        retry = []
+        for row, (line, record) in zip(rows, lines):
+            if row["email"].lower() in taken:
+                report.fail(line, ["Email already registered"], row["email"])
+            else:
+                retry.append((row, line))
+        rows = [row for row, _ in retry]
+        if rows:
+            try:
+                await db.execute(insert(model), rows)
+                await db.commit()
+            except IntegrityError:
+                # Still conflicting; report the batch instead of losing the whole import
+                await db.rollback()
+                logger.warning(f"Bulk import of {kind}: batch rejected twice by the database, {len(rows)} rows skipped")
+                for row, line in retry:
+                    report.fail(line, ["Conflicts with an existing record"], row["email"])
+                rows = []
+    report.created += len(rows)
+
+
+async def import_records(
+    db: AsyncSession,
+    kind: str,
+    records: AsyncIterator[tuple[int, Optional[dict], Optional[str]]],
+    batch_size: int = BULK_IMPORT_BATCH_SIZE,
+    hash_concurrency: int = BULK_IMPORT_HASH_CONCURRENCY,
+) -> ImportReport:
+    """Validate and import parsed records in batches, returning the per-row report."""
+    schema = IMPORT_KINDS[kind][0]
+    report = ImportReport(kind)
+    seen = set()  # Emails earlier in this file
+    batch = []
+
+    async for line, data, parse_error in records:
+        report.received += 1
+        if parse_error:
+            report.fail(line, [parse_error])
+            continue
+        try:
+            record = schema.model_validate(data)
+        except ValidationError as e:
+            report.fail(line, [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()], data.get("email"))
+            continue
+        if record.email.lower() in seen:
+            report.fail(line, ["Duplicate email in this file"], record.email)
+            continue
+        seen.add(record.email.lower())
+
+        batch.append((line, record))
+        if len(batch) >= batch_size:
+            await import_batch(db, kind, batch, report, hash_concurrency)
+            batch = []
+    if batch:
+        await import_batch(db, kind, batch, report, hash_concurrency)
+
+    if kind == "doctors" and report.created:
+        await bump_directory_version()
+    logger.info(f"Bulk import of {kind}: {report.created} created, {report.failed} failed of {report.received}")
+    return report
+
+
+async def require_import_token(x_import_token: Optional[str] = Header(None)) -> None:
+    """Dependency guarding the import endpoints with the BULK_IMPORT_TOKEN secret."""
+    if not BULK_IMPORT_TOKEN:
+        raise HTTPException(status_code=403, detail="Bulk import is disabled")
+    if not x_import_token or not secrets.compare_digest(x_import_token, BULK_IMPORT_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid import token")
+
+
+# -------------------- CLI ----------------------------
+
+def main() -> None:
+    from app.core.logging_config import setup_logging
+    from app.database import AsyncSessionLocal
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=sorted(IMPORT_KINDS))
+    parser.add_argument("file", help="NDJSON (.ndjson / .jsonl) or CSV (.csv) file")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default=None, help="override the format guessed from the file name")
+    parser.add_argument("--batch-size", type=int, default=BULK_IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    setup_logging()
+    fmt = args.format or ("csv" if args.file.lower().endswith(".csv") else "ndjson")
+
+    async def chunks():
+        with open(args.file, "rb") as f:
+            while chunk := f.read(1 << 16):
+                yield chunk
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            # Nothing else uses this process's bcrypt pool, so take all of it
+            return await import_records(
+                db, args.kind, iter_records(iter_lines(chunks()), fmt), args.batch_size, PASSWORD_HASH_WORKERS
+            )
+
+    print(json.dumps(asyncio.run(run()).as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Pre-serialized, versioned pages of the doctor directory (GET /doctors/).
+
+A version counter in Redis is bumped whenever a doctor is created or updated.
+Each page is cached per worker under (version, filters, cursor, limit) as the
+exact JSON bytes sent to clients, and its strong ETag is derived from the same
+key. A client polling with If-None-Match therefore costs one Redis GET and a
+304, without touching the database or re-serializing anything.
+
+When the counter is missing (first use, or after a Redis restart or flush) it
+is seeded with the current time in nanoseconds rather than starting at 0, so a
+version, and therefore an ETag, is never handed out twice.
+"""
+import hashlib
+import logging
+import os
+import time
+from typing import List, NamedTuple, Optional
+from dotenv import load_dotenv
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.redis import redis_client
+from app.services.events import publish_event
+from app.models.doctor import Doctor
+from app.schemas.doctor import DoctorResponse
+from app.utils.pagination import fetch_page
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DOCTOR_DIRECTORY_TTL = int(os.getenv("DOCTOR_DIRECTORY_TTL", "300"))
+DOCTOR_DIRECTORY_SIZE = int(os.getenv("DOCTOR_DIRECTORY_SIZE", "256"))
+
+DIRECTORY_VERSION_KEY = "directory:doctors:version"
+
+directory_cache = TTLCache("doctor_directory", maxsize=DOCTOR_DIRECTORY_SIZE, ttl=DOCTOR_DIRECTORY_TTL)
+doctor_list_adapter = TypeAdapter(List[DoctorResponse])
+
+
+class DirectoryPage(NamedTuple):
+    body: bytes
+    next_cursor: Optional[str]
+
+
+async def seed_directory_version() -> None:
+    """Start a missing counter from a fresh epoch, so versions from before a flush aren't reused."""
+    await redis_client.set(DIRECTORY_VERSION_KEY, time.time_ns(), nx=True)
+
+async def get_directory_version() -> Optional[int]:
+    """Current directory version, or None if Redis is unavailable (pages are then served uncached)."""
+    try:
+        version = await redis_client.get(DIRECTORY_VERSION_KEY)
+        if version is None:
+            await seed_directory_version()
+            version = await redis_client.get(DIRECTORY_VERSION_KEY)
+        return int(version)
+    except Exception as e:
+        logger.warning(f"Doctor directory version unavailable: {e}")
+        return None
+
+async def bump_directory_version() -> None:
+    """Invalidate every cached page and ETag, in all workers. Call after committing a doctor change."""
+    directory_cache.clear()
+    try:
+        await seed_directory_version()
+        version = await redis_client.incr(DIRECTORY_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Doctor directory version bump failed: {e}")
+        return
+    await publish_event("doctors.changed", version=version)
+
+
+def directory_etag(version: int, specialization_id: Optional[int], cursor: Optional[str], limit: int) -> str:
+    digest = hashlib.sha1(f"{specialization_id}:{cursor}:{limit}".encode()).hexdigest()[:16]
+    return f'"doctors-{version}-{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches the ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def get_directory_page(
+    db: AsyncSession,
+    version: Optional[int],
+    specialization_id: Optional[int],
+    cursor: Optional[str],
+    limit: int,
+) -> DirectoryPage:
+    """One serialized page of doctors, from the cache when this version was already built."""
+    key = (version, specialization_id, cursor, limit)
+    if version is not None:
+        page = directory_cache.get(key)
+        if page is not None:
+            return page
+
+    query = select(Doctor)
+    if specialization_id is not None:
+        query = query.where(Doctor.specialization_id == specialization_id)
+    doctors, next_cursor = await fetch_page(db, query, [Doctor.id], cursor, limit)
+    page = DirectoryPage(doctor_list_adapter.dump_json(doctor_list_adapter.validate_python(doctors, from_attributes=True)), next_cursor)
+
+    if version is not None:
+        directory_cache.set(key, page)
+    return page
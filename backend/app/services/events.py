@@ -0,0 +1,91 @@
+"""
+Appointment and directory change events, pushed to browsers over Server-Sent Events.
+
+Writers publish to one Redis pub/sub channel, so every worker sees every event.
+Each worker runs a single subscriber task that fans messages out to the
+in-process queues of its connected SSE clients.
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Optional
+from dotenv import load_dotenv
+
+from app.core.redis import redis_client
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "events:appointments"
+
+# Events buffered per client; a client that falls further behind misses events
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+
+
+async def publish_event(event_type: str, **data) -> None:
+    """Publish an event to every worker. Failures are logged, never raised to the writer."""
+    try:
+        await redis_client.publish(EVENTS_CHANNEL, json.dumps({"type": event_type, **data}, default=str))
+    except Exception as e:
+        logger.warning(f"Failed to publish {event_type} event: {e}")
+
+async def publish_appointment_event(event_type: str, appointment) -> None:
+    """Publish an appointment.* event for a committed appointment."""
+    await publish_event(
+        event_type,
+        id=appointment.id,
+        doctor_id=appointment.doctor_id,
+        patient_id=appointment.patient_id,
+        scheduled_datetime=appointment.scheduled_datetime.isoformat(),
+        status=appointment.status.value if hasattr(appointment.status, "value") else appointment.status,
+    )
+
+
+class EventBroker:
+    """Per-worker fan-out from the Redis channel to SSE client queues."""
+
+    def __init__(self):
+        self.subscribers: set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    def dispatch(self, event: dict) -> None:
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning("SSE client is too slow, dropping event")
+
+    async def _listen(self) -> None:
+        # Runs while anyone is connected; reconnects if Redis drops the subscription
+        while self.subscribers:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(EVENTS_CHANNEL)
+                while self.subscribers:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        self.dispatch(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event subscription lost, retrying: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+broker = EventBroker()
@@ -0,0 +1,205 @@
+"""
+Per-doctor daily availability bitmaps kept in Redis.
+
+Slots are fixed hourly between 09:00 and 17:00, so one doctor-day fits in a
+single byte: bit i (Redis bit offset i) is set when the slot starting at
+09:00 + i hours holds a live (non-cancelled) appointment. Bitmaps are filled
+from the database on first read and kept current by the booking / cancel
+endpoints; the database (and its unique slot index) stays the source of truth,
+so a cached "booked" bit is only a hint and never rejects a booking by itself.
+
+Every booking or cancellation bumps the doctor-day's generation counter, and a
+fill only lands if the generation is still the one read before its database
+query, so a slow reader can't cache a day that changed underneath it.
+Cancellations drop the day's bitmap instead of clearing one bit.
+
+Rebuild after a Redis flush or drift:
+    python -m app.services.slot_index rebuild [--doctor-id ID] [--start YYYY-MM-DD] [--days N]
+"""
+import argparse
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import redis_client
+from app.models.appointment import Appointment as AppointmentModel, AppointmentStatus as AppointmentStatusModel
+from app.utils.helper import get_booked_slots_for_doctor
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SLOT_START_HOUR = 9
+SLOT_END_HOUR = 17
+SLOTS_PER_DAY = SLOT_END_HOUR - SLOT_START_HOUR
+
+# Bitmaps filled from the database expire so any missed update heals itself
+SLOT_INDEX_TTL = int(os.getenv("SLOT_INDEX_TTL", "3600"))
+
+# Write the whole byte only if the key is absent and the day hasn't changed since
+# the reader queried the database, so a slow reader never caches stale bits.
+FILL_SCRIPT = redis_client.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 and (redis.call('GET', KEYS[2]) or '') == ARGV[3] then
+    redis.call('BITFIELD', KEYS[1], 'SET', 'u8', 0, ARGV[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+""")
+
+# Bump the generation, then set the slot on an existing bitmap (booking) or drop the
+# bitmap (cancellation); absent days are filled lazily from the database.
+MARK_SCRIPT = redis_client.register_script("""
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+if ARGV[2] == '0' then
+    return redis.call('DEL', KEYS[1])
+end
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('SETBIT', KEYS[1], ARGV[1], 1)
+end
+return -1
+""")
+
+
+def slot_key(doctor_id: int, day: date) -> str:
+    return f"slots:doctor:{doctor_id}:{day.isoformat()}"
+
+def generation_key(doctor_id: int, day: date) -> str:
+    return f"slots:generation:{doctor_id}:{day.isoformat()}"
+
+def slot_offset(scheduled_datetime: datetime) -> Optional[int]:
+    """Bit offset of a slot, or None if it falls outside working hours / off the hour."""
+    if scheduled_datetime.minute or scheduled_datetime.second or scheduled_datetime.microsecond:
+        return None
+    offset = scheduled_datetime.hour - SLOT_START_HOUR
+    return offset if 0 <= offset < SLOTS_PER_DAY else None
+
+def bitmap_from_slots(slots: list[datetime]) -> int:
+    """Pack booked slot datetimes of one day into the u8 BITFIELD value (offset 0 = MSB)."""
+    value = 0
+    for slot in slots:
+        offset = slot_offset(slot)
+        if offset is not None:
+            value |= 1 << (7 - offset)
+    return value
+
+def slots_from_bitmap(day: date, value: int) -> list[datetime]:
+    """Unpack a u8 BITFIELD value into the booked slot datetimes of that day."""
+    return [
+        datetime.combine(day, time(SLOT_START_HOUR + offset))
+        for offset in range(SLOTS_PER_DAY)
+        if value & (1 << (7 - offset))
+    ]
+
+
+async def read_bitmap(doctor_id: int, day: date) -> Optional[int]:
+    """The cached bitmap for a doctor-day, or None if it isn't cached (or Redis is unavailable)."""
+    try:
+        key = slot_key(doctor_id, day)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.exists(key)
+            pipe.bitfield(key).get("u8", 0).execute()
+            exists, (value,) = await pipe.execute()
+        return value if exists else None
+    except Exception as e:
+        logger.warning(f"Slot index read failed for doctor ID={doctor_id} on {day}: {e}")
+        return None
+
+async def fill_bitmap(db: AsyncSession, doctor_id: int, day: date) -> int:
+    """Load a doctor-day from the database and cache it, unless it changed meanwhile."""
+    try:
+        generation = await redis_client.get(generation_key(doctor_id, day)) or ""
+    except Exception as e:
+        logger.warning(f"Slot index generation read failed for doctor ID={doctor_id} on {day}: {e}")
+        generation = None
+    start = datetime.combine(day, time(SLOT_START_HOUR))
+    end = datetime.combine(day, time(SLOT_END_HOUR))
+    value = bitmap_from_slots(await get_booked_slots_for_doctor(db, doctor_id, start, end))
+    if generation is None:
+        return value
+    try:
+        await FILL_SCRIPT(keys=[slot_key(doctor_id, day), generation_key(doctor_id, day)], args=[value, SLOT_INDEX_TTL, generation])
+    except Exception as e:
+        logger.warning(f"Slot index fill failed for doctor ID={doctor_id} on {day}: {e}")
+    return value
+
+async def mark_slot(doctor_id: int, scheduled_datetime: datetime, booked: bool) -> None:
+    """Record a committed booking (booked=True) or cancellation (booked=False)."""
+    offset = slot_offset(scheduled_datetime)
+    if offset is None:
+        return
+    day = scheduled_datetime.date()
+    try:
+        await MARK_SCRIPT(keys=[slot_key(doctor_id, day), generation_key(doctor_id, day)], args=[offset, int(booked), SLOT_INDEX_TTL])
+    except Exception as e:
+        logger.warning(f"Slot index update failed for doctor ID={doctor_id} at {scheduled_datetime}: {e}")
+
+
+async def rebuild(db: AsyncSession, start: date, days: int, doctor_id: Optional[int] = None) -> int:
+    """
+    Recompute the bitmaps of every doctor-day in [start, start + days) from the
+    database, replacing whatever Redis holds. Returns the number of bitmaps written.
+    """
+    end = start + timedelta(days=days)
+    query = select(AppointmentModel.doctor_id, AppointmentModel.scheduled_datetime).where(
+        AppointmentModel.scheduled_datetime >= datetime.combine(start, time.min),
+        AppointmentModel.scheduled_datetime < datetime.combine(end, time.min),
+        AppointmentModel.status != AppointmentStatusModel.CANCELLED
+    )
+    if doctor_id is not None:
+        query = query.where(AppointmentModel.doctor_id == doctor_id)
+
+    booked = defaultdict(list)
+    for row_doctor_id, scheduled_datetime in (await db.execute(query)).all():
+        booked[(row_doctor_id, scheduled_datetime.date())].append(scheduled_datetime)
+
+    # Drop cached days in range first, so days whose bookings were all cancelled refill lazily
+    pattern = f"slots:doctor:{doctor_id if doctor_id is not None else '*'}:*"
+    stale = []
+    async for key in redis_client.scan_iter(match=pattern, count=1000):
+        if start <= date.fromisoformat(key.rsplit(":", 1)[1]) < end:
+            stale.append(key)
+    for i in range(0, len(stale), 1000):
+        await redis_client.delete(*stale[i:i + 1000])
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for (row_doctor_id, day), slots in booked.items():
+            key = slot_key(row_doctor_id, day)
+            pipe.bitfield(key).set("u8", 0, bitmap_from_slots(slots)).execute()
+            pipe.expire(key, SLOT_INDEX_TTL)
+        await pipe.execute()
+    logger.info(f"Slot index rebuilt: {len(stale)} cleared, {len(booked)} written ({start} + {days} days)")
+    return len(booked)
+
+
+def main() -> None:
+    from app.core.logging_config import setup_logging
+    from app.database import AsyncSessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the doctor slot bitmaps in Redis.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="recompute bitmaps from the database")
+    rebuild_parser.add_argument("--doctor-id", type=int, default=None, help="only this doctor")
+    rebuild_parser.add_argument("--start", type=date.fromisoformat, default=None, help="first day (default today)")
+    rebuild_parser.add_argument("--days", type=int, default=90, help="number of days (default 90)")
+    args = parser.parse_args()
+    setup_logging()
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await rebuild(db, args.start or date.today(), args.days, args.doctor_id)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Process-wide catalog of specializations.
+
+The table is small and practically static, so each worker loads it once at
+startup and serves name / ID lookups and the specialization endpoints from
+memory. The catalog reloads after SPECIALIZATION_CATALOG_TTL seconds, on an
+unknown name or ID (at most every SPECIALIZATION_CATALOG_MISS_RELOAD seconds,
+so rows added by another process show up quickly), or when invalidated.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models.specialization import Specialization as SpecializationModel
+from app.schemas.specialization import Specialization as SpecializationSchema
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SPECIALIZATION_CATALOG_TTL = int(os.getenv("SPECIALIZATION_CATALOG_TTL", "3600"))
+SPECIALIZATION_CATALOG_MISS_RELOAD = int(os.getenv("SPECIALIZATION_CATALOG_MISS_RELOAD", "10"))
+
+
+class SpecializationCatalog:
+    def __init__(self):
+        self.by_id: dict[int, SpecializationSchema] = {}
+        self.by_name: dict[str, SpecializationSchema] = {}
+        self.ordered: list[SpecializationSchema] = []
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def load(self) -> None:
+        """(Re)load every specialization from the database."""
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(select(SpecializationModel).order_by(SpecializationModel.name.asc()))).scalars().all()
+        ordered = [SpecializationSchema.model_validate(row) for row in rows]
+        # Swap whole maps so concurrent readers never see a half-built catalog
+        self.by_id = {spec.id: spec for spec in ordered}
+        self.by_name = {spec.name.casefold(): spec for spec in ordered}
+        self.ordered = ordered
+        self.loaded_at = time.monotonic()
+        logger.info(f"Specialization catalog loaded: {len(ordered)} entries")
+
+    async def _reload_if_older_than(self, max_age: float) -> None:
+        async with self._lock:
+            # Another request may have reloaded while this one waited for the lock
+            if self.loaded_at is None or time.monotonic() - self.loaded_at >= max_age:
+                await self.load()
+
+    async def ensure_fresh(self) -> None:
+        if self.loaded_at is None or time.monotonic() - self.loaded_at >= SPECIALIZATION_CATALOG_TTL:
+            await self._reload_if_older_than(SPECIALIZATION_CATALOG_TTL)
+
+    def invalidate(self) -> None:
+        """Force a reload on the next lookup (call after adding or renaming a specialization)."""
+        self.loaded_at = None
+
+    async def get_by_name(self, name: str) -> Optional[SpecializationSchema]:
+        """Case-insensitive lookup by name, or None if not found."""
+        await self.ensure_fresh()
+        spec = self.by_name.get(name.strip().casefold())
+        if spec is None:
+            await self._reload_if_older_than(SPECIALIZATION_CATALOG_MISS_RELOAD)
+            spec = self.by_name.get(name.strip().casefold())
+        return spec
+
+    async def get_by_id(self, specialization_id: int) -> Optional[SpecializationSchema]:
+        """Lookup by ID, or None if not found."""
+        await self.ensure_fresh()
+        spec = self.by_id.get(specialization_id)
+        if spec is None:
+            await self._reload_if_older_than(SPECIALIZATION_CATALOG_MISS_RELOAD)
+            spec = self.by_id.get(specialization_id)
+        return spec
+
+    async def list_specializations(self, skip: int = 0, limit: int = 100) -> list[SpecializationSchema]:
+        """Specializations ordered by name."""
+        await self.ensure_fresh()
+        return self.ordered[skip:skip + limit]
+
+
+specialization_catalog = SpecializationCatalog()
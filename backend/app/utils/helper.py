@@ -1,6 +1,7 @@
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 
@@ -8,6 +9,8 @@ from app.models.doctor import Doctor as DoctorModel
 from app.models.patient import Patient as PatientModel
 from app.models.specialization import Specialization as SpecializationModel
 from app.models.appointment import Appointment as AppointmentModel, AppointmentStatus as AppointmentStatusModel
+from app.core.password_pool import run_password_job
+from app.utils.pagination import fetch_page
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -20,110 +23,168 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
     return pwd_context.verify(plain_password, hashed_password)
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the bcrypt worker pool."""
+    return await run_password_job("hash", hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bcrypt worker pool."""
+    return await run_password_job("verify", verify_password, plain_password, hashed_password)
+
 # -------------------- Doctors ----------------------------
 
-def doctor_exists(db: Session, doctor_id: int) -> bool:
+async def doctor_exists(db: AsyncSession, doctor_id: int) -> bool:
     """Check if a doctor with the given ID exists."""
-    return db.query(DoctorModel).filter(DoctorModel.id == doctor_id).first() is not None
+    result = await db.execute(select(DoctorModel.id).where(DoctorModel.id == doctor_id).limit(1))
+    return result.first() is not None
 
-def get_doctor_by_id(db: Session, doctor_id: int) -> Optional[DoctorModel]:
+async def get_doctor_by_id(db: AsyncSession, doctor_id: int) -> Optional[DoctorModel]:
     """Get a doctor by ID, or None if not found."""
-    return db.query(DoctorModel).filter(DoctorModel.id == doctor_id).first()
+    result = await db.execute(select(DoctorModel).where(DoctorModel.id == doctor_id))
+    return result.scalars().first()
 
-def get_doctor_by_id_or_404(db: Session, doctor_id: int) -> DoctorModel:
+async def get_doctor_by_id_or_404(db: AsyncSession, doctor_id: int) -> DoctorModel:
     """Get a doctor by ID, or raise 404."""
-    doctor = get_doctor_by_id(db, doctor_id)
+    doctor = await get_doctor_by_id(db, doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail=f"Doctor with id {doctor_id} not found")
     return doctor
 
+async def get_doctor_by_email(db: AsyncSession, email: str) -> Optional[DoctorModel]:
+    """Get a doctor by email, or None if not found."""
+    result = await db.execute(select(DoctorModel).where(DoctorModel.email == email))
+    return result.scalars().first()
+
 # -------------------- Patients ----------------------------
 
-def patient_exists(db: Session, patient_id: int) -> bool:
+async def patient_exists(db: AsyncSession, patient_id: int) -> bool:
     """Check if a patient with the given ID exists."""
-    return db.query(PatientModel).filter(PatientModel.id == patient_id).first() is not None
+    result = await db.execute(select(PatientModel.id).where(PatientModel.id == patient_id).limit(1))
+    return result.first() is not None
 
-def get_patient_by_id(db: Session, patient_id: int) -> Optional[PatientModel]:
+async def get_patient_by_id(db: AsyncSession, patient_id: int) -> Optional[PatientModel]:
     """Get a patient by ID, or None if not found."""
-    return db.query(PatientModel).filter(PatientModel.id == patient_id).first()
+    result = await db.execute(select(PatientModel).where(PatientModel.id == patient_id))
+    return result.scalars().first()
 
-def get_patient_by_id_or_404(db: Session, patient_id: int) -> PatientModel:
+async def get_patient_by_id_or_404(db: AsyncSession, patient_id: int) -> PatientModel:
     """Get a patient by ID, or raise 404."""
-    patient = get_patient_by_id(db, patient_id)
+    patient = await get_patient_by_id(db, patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail=f"Patient with id {patient_id} not found")
     return patient
 
+async def get_patient_by_email(db: AsyncSession, email: str) -> Optional[PatientModel]:
+    """Get a patient by email, or None if not found."""
+    result = await db.execute(select(PatientModel).where(PatientModel.email == email))
+    return result.scalars().first()
+
 # -------------------- Specializations ---------------------
 
-def get_specialization_by_name(db: Session, name: str) -> Optional[SpecializationModel]:
+async def get_specialization_by_name(db: AsyncSession, name: str) -> Optional[SpecializationModel]:
     """Get a specialization by name (case-insensitive), or None if not found."""
-    return db.query(SpecializationModel).filter(SpecializationModel.name.ilike(name)).first()
+    result = await db.execute(select(SpecializationModel).where(SpecializationModel.name.ilike(name)))
+    return result.scalars().first()
 
-def get_specialization_by_id(db: Session, specialization_id: int) -> Optional[SpecializationModel]:
+async def get_specialization_by_id(db: AsyncSession, specialization_id: int) -> Optional[SpecializationModel]:
     """Get a specialization by ID, or None if not found."""
-    return db.query(SpecializationModel).filter(SpecializationModel.id == specialization_id).first()
+    result = await db.execute(select(SpecializationModel).where(SpecializationModel.id == specialization_id))
+    return result.scalars().first()
 
-def get_specialization_by_id_or_404(db: Session, specialization_id: int) -> SpecializationModel:
+async def get_specialization_by_id_or_404(db: AsyncSession, specialization_id: int) -> SpecializationModel:
     """Get a specialization by ID, or raise 404."""
-    spec = get_specialization_by_id(db, specialization_id)
+    spec = await get_specialization_by_id(db, specialization_id)
     if not spec:
         raise HTTPException(status_code=404, detail=f"Specialization with id {specialization_id} not found")
     return spec
 
-def specialization_exists_by_id(db: Session, specialization_id: int) -> bool:
+async def specialization_exists_by_id(db: AsyncSession, specialization_id: int) -> bool:
     """Check if a specialization with the given ID exists."""
-    return get_specialization_by_id(db, specialization_id) is not None
+    return await get_specialization_by_id(db, specialization_id) is not None
 
-def specialization_exists_by_name(db: Session, name: str) -> bool:
+async def specialization_exists_by_name(db: AsyncSession, name: str) -> bool:
     """Check if a specialization with the given name exists (case-insensitive)."""
-    return get_specialization_by_name(db, name) is not None
+    return await get_specialization_by_name(db, name) is not None
 
 # -------------------- Appointment Checks --------------------
 
-def check_doctor_availability(db: Session, doctor_id: int, start_time: datetime, end_time: datetime) -> bool:
+async def check_doctor_availability(db: AsyncSession, doctor_id: int, start_time: datetime, end_time: datetime) -> bool:
     """Return True if doctor is available (no conflicting appointments)."""
-    return not db.query(AppointmentModel).filter(
+    result = await db.execute(select(AppointmentModel.id).where(
         AppointmentModel.doctor_id == doctor_id,
         AppointmentModel.scheduled_datetime >= start_time,
         AppointmentModel.scheduled_datetime < end_time,
         AppointmentModel.status != AppointmentStatusModel.CANCELLED
-    ).first()
+    ).limit(1))
+    return result.first() is None
 
-def patient_has_future_appointment_with_doctor(db: Session, patient_id: int, doctor_id: int, now: datetime) -> bool:
+async def patient_has_future_appointment_with_doctor(db: AsyncSession, patient_id: int, doctor_id: int, now: datetime) -> bool:
     """Return True if patient already has a future appointment with this doctor (not cancelled/completed)."""
-    return db.query(AppointmentModel).filter(
+    result = await db.execute(select(AppointmentModel.id).where(
         AppointmentModel.patient_id == patient_id,
         AppointmentModel.doctor_id == doctor_id,
         AppointmentModel.scheduled_datetime >= now,
         AppointmentModel.status.not_in([AppointmentStatusModel.CANCELLED, AppointmentStatusModel.COMPLETED])
-    ).first() is not None
+    ).limit(1))
+    return result.first() is not None
 
-def check_patient_available_at_time(db: Session, patient_id: int, scheduled_datetime: datetime) -> bool:
+async def check_patient_available_at_time(db: AsyncSession, patient_id: int, scheduled_datetime: datetime) -> bool:
     """Return True if patient does not have another appointment at the same time (not cancelled)."""
-    return not db.query(AppointmentModel).filter(
+    result = await db.execute(select(AppointmentModel.id).where(
         AppointmentModel.patient_id == patient_id,
         AppointmentModel.scheduled_datetime == scheduled_datetime,
         AppointmentModel.status != AppointmentStatusModel.CANCELLED
-    ).first()
+    ).limit(1))
+    return result.first() is None
 
 # -------------------- Appointment Queries --------------------
 
-def get_booked_slots_for_doctor(db: Session, doctor_id: int, start_time: datetime, end_time: datetime) -> List[datetime]:
+async def get_appointment_by_id(db: AsyncSession, appointment_id: int) -> Optional[AppointmentModel]:
+    """Get an appointment by ID, or None if not found."""
+    result = await db.execute(select(AppointmentModel).where(AppointmentModel.id == appointment_id))
+    return result.scalars().first()
+
+async def get_booked_slots_for_doctor(db: AsyncSession, doctor_id: int, start_time: datetime, end_time: datetime) -> List[datetime]:
     """Return all booked slots for a doctor in a given time range (excluding cancelled)."""
-    appointments = db.query(AppointmentModel).filter(
+    result = await db.execute(select(AppointmentModel.scheduled_datetime).where(
         AppointmentModel.doctor_id == doctor_id,
         AppointmentModel.scheduled_datetime >= start_time,
         AppointmentModel.scheduled_datetime < end_time,
         AppointmentModel.status != AppointmentStatusModel.CANCELLED
-    ).all()
-    return [appt.scheduled_datetime for appt in appointments]
-
-def get_all_appointments_for_patient(db: Session, patient_id: int) -> List[AppointmentModel]:
-    """Return all appointments for a patient."""
-    return db.query(AppointmentModel).filter(AppointmentModel.patient_id == patient_id).all()
-
-def get_all_appointments_for_doctor(db: Session, doctor_id: int) -> List[AppointmentModel]:
-    """Return all appointments for a doctor."""
-    return db.query(AppointmentModel).filter(AppointmentModel.doctor_id == doctor_id).all()
-
+    ))
+    return list(result.scalars().all())
+
+async def get_booked_slots_for_doctors(db: AsyncSession, doctor_ids: List[int], start_time: datetime, end_time: datetime) -> Dict[int, List[datetime]]:
+    """Return booked slots for several doctors in a given time range, keyed by doctor ID (one query)."""
+    booked = {doctor_id: [] for doctor_id in doctor_ids}
+    if not doctor_ids:
+        return booked
+    result = await db.execute(select(AppointmentModel.doctor_id, AppointmentModel.scheduled_datetime).where(
+        AppointmentModel.doctor_id.in_(doctor_ids),
+        AppointmentModel.scheduled_datetime >= start_time,
+        AppointmentModel.scheduled_datetime < end_time,
+        AppointmentModel.status != AppointmentStatusModel.CANCELLED
+    ))
+    for doctor_id, scheduled_datetime in result.all():
+        booked[doctor_id].append(scheduled_datetime)
+    return booked
+
+def filter_appointments(query, status: Optional[AppointmentStatusModel] = None, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None):
+    """Apply the optional status / scheduled date range filters shared by appointment listings."""
+    if status is not None:
+        query = query.where(AppointmentModel.status == status)
+    if date_from is not None:
+        query = query.where(AppointmentModel.scheduled_datetime >= date_from)
+    if date_to is not None:
+        query = query.where(AppointmentModel.scheduled_datetime < date_to)
+    return query
+
+async def get_appointments_page_for_patient(db: AsyncSession, patient_id: int, cursor: Optional[str], limit: int, **filters) -> Tuple[List[AppointmentModel], Optional[str]]:
+    """Return one page of a patient's appointments ordered by time, and the next cursor."""
+    query = filter_appointments(select(AppointmentModel).where(AppointmentModel.patient_id == patient_id), **filters)
+    return await fetch_page(db, query, [AppointmentModel.scheduled_datetime, AppointmentModel.id], cursor, limit)
+
+async def get_appointments_page_for_doctor(db: AsyncSession, doctor_id: int, cursor: Optional[str], limit: int, **filters) -> Tuple[List[AppointmentModel], Optional[str]]:
+    """Return one page of a doctor's appointments ordered by time, and the next cursor."""
+    query = filter_appointments(select(AppointmentModel).where(AppointmentModel.doctor_id == doctor_id), **filters)
+    return await fetch_page(db, query, [AppointmentModel.scheduled_datetime, AppointmentModel.id], cursor, limit)
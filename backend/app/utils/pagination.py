@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Page size limits shared by every listing endpoint
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort-key values of the last row into an opaque cursor."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, keys: list) -> List[Any]:
+    """Decode a cursor back into sort-key values, or raise 400 if it is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor does not match the sort keys")
+        return [
+            datetime.fromisoformat(value) if isinstance(key.type, DateTime) else int(value)
+            for key, value in zip(keys, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def after(keys: list, values: List[Any]):
+    """Row-value `(k1, k2, ...) > (v1, v2, ...)` spelled out so MySQL uses a range scan on the index."""
+    condition = keys[-1] > values[-1]
+    for key, value in zip(reversed(keys[:-1]), reversed(values[:-1])):
+        condition = or_(key > value, and_(key == value, condition))
+    return condition
+
+
+async def fetch_page(db: AsyncSession, query: Select, keys: list, cursor: Optional[str], limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Run `query` as one keyset page ordered by `keys` (ascending, last key unique).
+    Returns the rows and the cursor of the next page, or None on the last page.
+    No COUNT is issued, so every page costs the same as the first.
+    """
+    if cursor:
+        query = query.where(after(keys, decode_cursor(cursor, keys)))
+    rows = list((await db.execute(query.order_by(*keys).limit(limit + 1))).scalars().all())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], key.key) for key in keys])
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Expose the next page's cursor to the client."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,386 @@
+"""
+Load-test the booking API end to end.
+
+Drives the main flows concurrently and reports throughput and p50/p95/p99
+latency per scenario:
+
+    login          POST /patients/login (bcrypt on the password pool)
+    doctors        GET /doctors/ (directory cache, first page)
+    availability   GET /appointments/availability for a week
+    booked_slots   GET /appointments/doctor/{id}/{date} (slot bitmaps)
+    booking        POST /appointments/, every request for a different slot
+    contention     POST /appointments/, `--contenders` patients racing for each slot
+
+After the booking scenarios it checks the database for double bookings (two
+live appointments for one doctor slot, or for one patient at one time) and
+that every contended slot was won exactly once.
+
+`--lock-mode redis|database` runs the booking scenarios with that
+BOOKING_LOCK_MODE (Redis slot locks, or the unique slot indexes alone);
+`--lock-mode both` runs them once per mode, with their own patients and slots,
+to compare the two side by side.
+
+By default the app runs in-process (httpx over ASGI) against a fresh
+temporary SQLite database and an in-memory Redis (fakeredis, with lupa for
+the Lua lock scripts), so runs are reproducible on any machine. Use
+`--database configured` / `--redis configured` for the usual DB_* /
+DATABASE_URL and REDIS_HOST settings (e.g. a local MySQL), and `--url` to
+load a running server instead.
+
+Usage (from backend/):
+    python -m benchmarks.api_load
+    python -m benchmarks.api_load --database configured --redis configured --concurrency 64
+    python -m benchmarks.api_load --url http://localhost:8000 --database configured
+    python -m benchmarks.api_load --lock-mode both --slots 50 --contenders 50
+    python -m benchmarks.api_load --save baseline.json
+    python -m benchmarks.api_load --baseline baseline.json   # print the change against a saved run
+
+Exits with status 1 on any double booking, or if GET /health does not answer
+200 before the run, so it can gate CI.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+
+BENCHMARK_PASSWORD = "benchmark-password"
+
+
+def configure(args) -> None:
+    """Point the app at the benchmark database and Redis; must run before anything imports `app`."""
+    if args.database == "sqlite":
+        path = os.path.join(tempfile.mkdtemp(prefix="api-load-"), "benchmark.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        print(f"Database: {path}")
+
+    if args.redis == "fake":
+        try:
+            import fakeredis
+        except ImportError:
+            sys.exit("--redis fake needs fakeredis and lupa: pip install 'fakeredis[lua]'")
+        import redis.asyncio
+
+        server = fakeredis.FakeServer()
+        redis.asyncio.Redis = lambda *a, **kwargs: fakeredis.FakeAsyncRedis(
+            server=server, decode_responses=kwargs.get("decode_responses", False)
+        )
+
+
+def prepare_database(args) -> None:
+    """
+    Migrate a fresh SQLite database, then seed benchmark doctors and patients that can log in.
+    Appointments left by earlier runs against a configured database are deleted.
+    """
+    from alembic import command
+    from sqlalchemy import delete, or_, select, update
+
+    from app.core.schema import alembic_config
+    from app.database import engine
+    from app.models.appointment import Appointment
+    from app.models.doctor import Doctor
+    from app.models.patient import Patient
+    from app.populate_db.specializations_table import insert_specializations
+    from app.utils.helper import hash_password
+    from benchmarks.appointment_queries import seed
+
+    if args.database == "sqlite":
+        command.upgrade(alembic_config(), "head")
+        insert_specializations()
+
+    seed(0, args.doctors, args.patients)
+    password = hash_password(BENCHMARK_PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(update(Doctor).where(Doctor.email.like("bench.%")).values(password=password))
+        conn.execute(update(Patient).where(Patient.email.like("bench.%")).values(password=password))
+        conn.execute(delete(Appointment).where(or_(
+            Appointment.doctor_id.in_(select(Doctor.id).where(Doctor.email.like("bench.%"))),
+            Appointment.patient_id.in_(select(Patient.id).where(Patient.email.like("bench.%")))
+        )))
+
+
+async def reset_slot_index() -> None:
+    """Drop cached slot bitmaps, which may still show earlier runs' bookings."""
+    from app.core.redis import redis_client
+
+    keys = [key async for key in redis_client.scan_iter(match="slots:doctor:*")]
+    if keys:
+        await redis_client.delete(*keys)
+
+
+# -------------------- Measuring ----------------------------
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def measure(name: str, calls: list, concurrency: int, ok_statuses=(200,)) -> dict:
+    """Run the (coroutine factory) calls `concurrency` at a time; time each one and the whole batch."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], []
+
+    async def timed(call):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await call()
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses.append(response.status_code)
+            return response
+
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(timed(call) for call in calls))
+    elapsed = time.perf_counter() - started
+    return {
+        "name": name,
+        "requests": len(calls),
+        "errors": sum(status not in ok_statuses for status in statuses),
+        "throughput": len(calls) / elapsed if elapsed else 0.0,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies),
+        "responses": responses,
+    }
+
+
+def print_results(results: list, baseline: dict) -> None:
+    print(f"\n{'scenario':<22}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for result in results:
+        print(f"{result['name']:<22}{result['requests']:>9}{result['errors']:>8}{result['throughput']:>10.1f}"
+              f"{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}{result['max']:>10.1f}")
+        before = baseline.get(result["name"])
+        if before:
+            print(f"{'  vs baseline':<39}{(result['throughput'] / before['throughput'] - 1) * 100:>+9.0f}%"
+                  + "".join(f"{(result[key] / before[key] - 1) * 100:>+9.0f}%" for key in ("p50", "p95", "p99", "max")))
+
+
+# -------------------- Scenarios ----------------------------
+
+def working_day(offset: int) -> date:
+    """The offset-th weekday from tomorrow, so slots are always in the future."""
+    day = date.today() + timedelta(days=1)
+    while True:
+        if day.weekday() < 5:
+            if offset == 0:
+                return day
+            offset -= 1
+        day += timedelta(days=1)
+
+
+def slot_at(day: date, hour: int) -> str:
+    return datetime.combine(day, dtime(hour), tzinfo=timezone.utc).isoformat()
+
+
+async def count_double_bookings() -> tuple[int, int]:
+    """Doctor slots and patient times holding more than one live appointment."""
+    from sqlalchemy import func, select
+
+    from app.database import AsyncSessionLocal
+    from app.models.appointment import Appointment, AppointmentStatus
+
+    live = Appointment.status != AppointmentStatus.CANCELLED
+    async with AsyncSessionLocal() as db:
+        doctors = (await db.execute(select(func.count()).select_from(
+            select(Appointment.doctor_id).where(live)
+            .group_by(Appointment.doctor_id, Appointment.scheduled_datetime)
+            .having(func.count() > 1).subquery()
+        ))).scalar()
+        patients = (await db.execute(select(func.count()).select_from(
+            select(Appointment.patient_id).where(live)
+            .group_by(Appointment.patient_id, Appointment.scheduled_datetime)
+            .having(func.count() > 1).subquery()
+        ))).scalar()
+    return doctors, patients
+
+
+async def check_health(client) -> int:
+    """GET /health must answer 200 with the database up; returns the number of failures (0 or 1)."""
+    response = await client.get("/health")
+    body = response.json()
+    print(f"Health: {response.status_code} {body.get('status')} "
+          f"(database {body.get('database', {}).get('status')}, redis {body.get('redis', {}).get('status')})")
+    return 0 if response.status_code == 200 and body.get("database", {}).get("status") == "ok" else 1
+
+
+async def run_scenarios(client, args) -> tuple[list, int]:
+    from sqlalchemy import select
+
+    from app.auth import UserType, create_access_token
+    from app.database import AsyncSessionLocal
+    from app.models.doctor import Doctor
+    from app.models.patient import Patient
+
+    async with AsyncSessionLocal() as db:
+        doctor_ids = (await db.execute(select(Doctor.id).where(Doctor.email.like("bench.%")).order_by(Doctor.id))).scalars().all()
+        patients = (await db.execute(select(Patient.id, Patient.email).where(Patient.email.like("bench.%")).order_by(Patient.id))).all()
+
+    def patient_headers(patient_id: int) -> dict:
+        token = create_access_token({"sub": str(patient_id), "user_type": UserType.PATIENT})
+        return {"Authorization": f"Bearer {token}"}
+
+    rng = random.Random(42)
+    week = (working_day(0), working_day(4))
+    results = []
+
+    results.append(await measure("login", [
+        (lambda email=rng.choice(patients).email: client.post(
+            "/patients/login", data={"username": email, "password": BENCHMARK_PASSWORD}))
+        for _ in range(args.logins)
+    ], args.concurrency))
+
+    results.append(await measure("doctors", [
+        (lambda: client.get("/doctors/?limit=50")) for _ in range(args.requests)
+    ], args.concurrency))
+
+    results.append(await measure("availability", [
+        (lambda: client.get(f"/appointments/availability?start_date={week[0]}&end_date={week[1]}&limit=50"))
+        for _ in range(args.requests)
+    ], args.concurrency))
+
+    results.append(await measure("booked_slots", [
+        (lambda doctor_id=rng.choice(doctor_ids), day=working_day(rng.randrange(5)): client.get(
+            f"/appointments/doctor/{doctor_id}/{day}"))
+        for _ in range(args.requests)
+    ], args.concurrency))
+
+    modes = ["redis", "database"] if args.lock_mode == "both" else [args.lock_mode]
+    per_mode = args.bookings + args.contenders
+    failures = 0
+    for index, mode in enumerate(modes):
+        mode_results, mode_failures = await booking_scenarios(
+            client, args, mode, doctor_ids, patients[index * per_mode:(index + 1) * per_mode], patient_headers, day_offset=index * 100
+        )
+        results += mode_results
+        failures += mode_failures
+
+    doctor_doubles, patient_doubles = await count_double_bookings()
+    print(f"Double bookings: {doctor_doubles} doctor slot(s), {patient_doubles} patient time(s)")
+    return results, failures + doctor_doubles + patient_doubles
+
+
+async def booking_scenarios(client, args, mode, doctor_ids: list, patients: list, patient_headers, day_offset: int) -> tuple[list, int]:
+    """
+    The uncontended and contended booking scenarios, with BOOKING_LOCK_MODE set to `mode`
+    (None keeps the app's setting). Returns the results and the contended slots won more than once.
+    """
+    from app.services import appointment_service
+
+    suffix = ""
+    if mode:
+        appointment_service.BOOKING_LOCK_MODE = mode
+        suffix = f"[{mode}]"
+    rng = random.Random(42)
+    results = []
+
+    # Uncontended: patient i books doctor i % D; every (doctor, slot) pair is used once
+    bookers = patients[:args.bookings]
+    booking_calls = []
+    for i, (patient_id, _) in enumerate(bookers):
+        doctor_id = doctor_ids[i % len(doctor_ids)]
+        day_index, hour = divmod(i // len(doctor_ids), 8)
+        body = {"doctor_id": doctor_id, "patient_id": patient_id, "scheduled_datetime": slot_at(working_day(day_offset + 10 + day_index), 9 + hour)}
+        booking_calls.append(lambda body=body, headers=patient_headers(patient_id): client.post("/appointments/", json=body, headers=headers))
+    results.append(await measure("booking" + suffix, booking_calls, args.concurrency))
+
+    # Contended: `contenders` fresh patients race for each slot, one doctor per slot
+    contenders = patients[args.bookings:args.bookings + args.contenders]
+    contention_calls, slots = [], []
+    for round_index in range(args.slots):
+        # A different time each round, so one patient may win several rounds
+        doctor_id = doctor_ids[round_index % len(doctor_ids)]
+        scheduled = slot_at(working_day(day_offset + 40 + round_index // 8), 9 + round_index % 8)
+        slots.append((doctor_id, scheduled))
+        for patient_id, _ in contenders:
+            body = {"doctor_id": doctor_id, "patient_id": patient_id, "scheduled_datetime": scheduled}
+            contention_calls.append(lambda body=body, headers=patient_headers(patient_id): client.post("/appointments/", json=body, headers=headers))
+    rng.shuffle(contention_calls)
+    contention = await measure("contention" + suffix, contention_calls, args.concurrency, ok_statuses=(200, 409))
+    results.append(contention)
+
+    # Correctness: each contended slot must be won exactly once
+    winners = {}
+    for response in contention["responses"]:
+        if response.status_code == 200:
+            booked = response.json()
+            key = (booked["doctor_id"], booked["scheduled_datetime"])
+            winners[key] = winners.get(key, 0) + 1
+    unbooked = args.slots - len(winners)
+    multiple = sum(count > 1 for count in winners.values())
+
+    print(f"\nContention{' ' + suffix if suffix else ''}: {args.slots} slots x {len(contenders)} contenders, "
+          f"{sum(winners.values())} bookings succeeded, {unbooked} slot(s) never booked, "
+          f"{multiple} slot(s) won more than once")
+    return results, multiple
+
+
+async def run(args) -> int:
+    import httpx
+
+    await reset_slot_index()
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+            unhealthy = await check_health(client)
+            results, failures = await run_scenarios(client, args)
+    else:
+        from main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+                unhealthy = await check_health(client)
+                results, failures = await run_scenarios(client, args)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {result["name"]: result for result in json.load(f)["results"]}
+    print_results(results, baseline)
+
+    if args.save:
+        summary = [{key: value for key, value in result.items() if key != "responses"} for result in results]
+        with open(args.save, "w") as f:
+            json.dump({"args": vars(args), "results": summary}, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+    return 1 if failures or unhealthy else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", choices=["sqlite", "configured"], default="sqlite",
+                        help="fresh temporary SQLite database, or the DB_* / DATABASE_URL settings")
+    parser.add_argument("--redis", choices=["fake", "configured"], default="fake",
+                        help="in-memory fakeredis, or the Redis at REDIS_HOST")
+    parser.add_argument("--url", default=None, help="load a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight at once")
+    parser.add_argument("--requests", type=int, default=500, help="requests per read scenario")
+    parser.add_argument("--logins", type=int, default=100, help="login requests")
+    parser.add_argument("--bookings", type=int, default=200, help="uncontended bookings")
+    parser.add_argument("--slots", type=int, default=20, help="contended slots")
+    parser.add_argument("--contenders", type=int, default=20, help="patients racing for each contended slot")
+    parser.add_argument("--doctors", type=int, default=50, help="benchmark doctors to seed if missing")
+    parser.add_argument("--lock-mode", choices=["redis", "database", "both"], default=None,
+                        help="BOOKING_LOCK_MODE for the booking scenarios (default: the app's setting)")
+    parser.add_argument("--save", default=None, help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="compare with results saved by --save")
+    args = parser.parse_args()
+    args.patients = (args.bookings + args.contenders) * (2 if args.lock_mode == "both" else 1)
+
+    if args.url and args.database == "sqlite":
+        parser.error("--url needs --database configured, pointing at the server's database")
+    if args.url and args.lock_mode:
+        parser.error("--lock-mode only applies to the in-process app; set BOOKING_LOCK_MODE on the server instead")
+    configure(args)
+    prepare_database(args)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
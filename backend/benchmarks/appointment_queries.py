@@ -0,0 +1,182 @@
+"""
+Benchmark the appointment lookups from app/utils/helper.py on a large table.
+
+Seeds doctors, patients and `--rows` appointments (10M by default) into the
+database configured by the usual DB_* / DATABASE_URL settings, then times
+check_doctor_availability, get_booked_slots_for_doctor,
+patient_has_future_appointment_with_doctor and check_patient_available_at_time
+against random doctors, patients and slots.
+
+Usage (from backend/, after `alembic upgrade head`):
+    python -m benchmarks.appointment_queries --rows 10000000
+    python -m benchmarks.appointment_queries --skip-seed --explain
+
+To compare with the un-indexed table, run it once at `alembic downgrade 0001`
+and once at `alembic upgrade head` against the same seeded data.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, date
+
+from sqlalchemy import event, func, insert, select
+
+from app.database import engine, async_engine, AsyncSessionLocal
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.specialization import Specialization
+from app.utils.helper import (
+    check_doctor_availability,
+    check_patient_available_at_time,
+    get_booked_slots_for_doctor,
+    patient_has_future_appointment_with_doctor,
+)
+
+BATCH_SIZE = 10_000
+SLOTS_PER_DAY = 8  # 09:00 - 16:00 hourly
+FIRST_DAY = date(2024, 1, 1)
+PASSWORD_HASH = "$2b$12$benchmarkbenchmarkbenchmarkbenchmarkbenchmarkbenchmar"
+
+
+def slot_for(index: int) -> datetime:
+    """The index-th working-hours slot counted from FIRST_DAY."""
+    day, hour = divmod(index, SLOTS_PER_DAY)
+    return datetime.combine(FIRST_DAY + timedelta(days=day), datetime.min.time()) + timedelta(hours=9 + hour)
+
+
+def seed(rows: int, doctors: int, patients: int) -> None:
+    """Insert the benchmark data in batches (skips whatever is already there)."""
+    with engine.begin() as conn:
+        specialization_id = conn.execute(select(Specialization.id).limit(1)).scalar()
+        if specialization_id is None:
+            specialization_id = conn.execute(insert(Specialization).values(name="Benchmark")).inserted_primary_key[0]
+
+        existing = conn.execute(select(func.count()).select_from(Doctor)).scalar()
+        for start in range(existing, doctors, BATCH_SIZE):
+            conn.execute(insert(Doctor), [
+                {
+                    "first_name": "Doctor", "last_name": f"Bench{i}", "date_of_birth": date(1980, 1, 1),
+                    "gender": "male", "specialization_id": specialization_id,
+                    "email": f"bench.doctor{i}@example.com", "phone": "0700000000", "password": PASSWORD_HASH,
+                }
+                for i in range(start, min(start + BATCH_SIZE, doctors))
+            ])
+
+        existing = conn.execute(select(func.count()).select_from(Patient)).scalar()
+        for start in range(existing, patients, BATCH_SIZE):
+            conn.execute(insert(Patient), [
+                {
+                    "first_name": "Patient", "last_name": f"Bench{i}", "date_of_birth": date(1990, 1, 1),
+                    "gender": "female", "email": f"bench.patient{i}@example.com", "phone": "0700000000",
+                    "password": PASSWORD_HASH,
+                }
+                for i in range(start, min(start + BATCH_SIZE, patients))
+            ])
+
+        doctor_ids = conn.execute(select(Doctor.id).order_by(Doctor.id).limit(doctors)).scalars().all()
+        patient_ids = conn.execute(select(Patient.id).order_by(Patient.id).limit(patients)).scalars().all()
+        existing = conn.execute(select(func.count()).select_from(Appointment)).scalar()
+
+    rng = random.Random(42)
+    statuses = [AppointmentStatus.SCHEDULED] * 6 + [AppointmentStatus.COMPLETED] * 3 + [AppointmentStatus.CANCELLED]
+    started = time.perf_counter()
+    doctor_count, patient_count = len(doctor_ids), len(patient_ids)
+    for start in range(existing, rows, BATCH_SIZE):
+        # Row i goes to doctor k = i % D in that doctor's s = (i // D)-th slot, so live doctor slots
+        # never collide. Its patient is (s + k) % P, distinct within a slot while k < P; rows with
+        # k >= P are cancelled, so no patient holds two live appointments at one time either.
+        batch = [
+            {
+                "doctor_id": doctor_ids[i % doctor_count],
+                "patient_id": patient_ids[(i // doctor_count + i % doctor_count) % patient_count],
+                "scheduled_datetime": slot_for(i // doctor_count),
+                "status": rng.choice(statuses) if i % doctor_count < patient_count else AppointmentStatus.CANCELLED,
+            }
+            for i in range(start, min(start + BATCH_SIZE, rows))
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(Appointment), batch)
+        done = start + len(batch)
+        if done % (BATCH_SIZE * 50) == 0 or done == rows:
+            print(f"  seeded {done:,}/{rows:,} appointments ({time.perf_counter() - started:.0f}s)")
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run_queries(iterations: int, doctors: int, patients: int, rows: int, explain: bool) -> None:
+    async with AsyncSessionLocal() as db:
+        doctor_ids = (await db.execute(select(Doctor.id).order_by(Doctor.id).limit(doctors))).scalars().all()
+        patient_ids = (await db.execute(select(Patient.id).order_by(Patient.id).limit(patients))).scalars().all()
+    slots_used = max(1, rows // max(1, len(doctor_ids)))
+    rng = random.Random(7)
+
+    def random_slot() -> datetime:
+        return slot_for(rng.randrange(slots_used))
+
+    cases = {
+        "check_doctor_availability": lambda db: check_doctor_availability(
+            db, rng.choice(doctor_ids), (s := random_slot()) - timedelta(minutes=30), s + timedelta(minutes=30)),
+        "get_booked_slots_for_doctor": lambda db: get_booked_slots_for_doctor(
+            db, rng.choice(doctor_ids), (s := random_slot()).replace(hour=9), s.replace(hour=17)),
+        "patient_has_future_appointment_with_doctor": lambda db: patient_has_future_appointment_with_doctor(
+            db, rng.choice(patient_ids), rng.choice(doctor_ids), random_slot()),
+        "check_patient_available_at_time": lambda db: check_patient_available_at_time(
+            db, rng.choice(patient_ids), random_slot()),
+    }
+
+    print(f"\n{'query':<46}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, call in cases.items():
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            captured.append((statement, parameters))
+
+        samples = []
+        async with AsyncSessionLocal() as db:
+            await call(db)  # Warm-up
+            event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+            try:
+                await call(db)
+            finally:
+                event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+            for _ in range(iterations):
+                start = time.perf_counter()
+                await call(db)
+                samples.append((time.perf_counter() - start) * 1000)
+        print(f"{name:<46}{statistics.median(samples):>10.2f}{percentile(samples, 0.95):>10.2f}"
+              f"{percentile(samples, 0.99):>10.2f}{max(samples):>10.2f}")
+
+        if explain and captured:
+            statement, parameters = captured[-1]
+            prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+            with engine.connect() as conn:
+                for row in conn.exec_driver_sql(prefix + statement, parameters):
+                    print("    ", tuple(row))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="appointments to seed (default 10M)")
+    parser.add_argument("--doctors", type=int, default=None, help="doctors to seed (default rows / 5000)")
+    parser.add_argument("--patients", type=int, default=None, help="patients to seed (default rows / 50)")
+    parser.add_argument("--iterations", type=int, default=500, help="timed calls per query")
+    parser.add_argument("--skip-seed", action="store_true", help="benchmark the existing data as-is")
+    parser.add_argument("--explain", action="store_true", help="print the query plan of each lookup")
+    args = parser.parse_args()
+
+    doctors = args.doctors or max(10, args.rows // 5000)
+    patients = args.patients or max(100, args.rows // 50)
+    if not args.skip_seed:
+        print(f"Seeding {args.rows:,} appointments for {doctors:,} doctors and {patients:,} patients...")
+        seed(args.rows, doctors, patients)
+    asyncio.run(run_queries(args.iterations, doctors, patients, args.rows, args.explain))
+
+
+if __name__ == "__main__":
+    main()
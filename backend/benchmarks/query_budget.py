@@ -0,0 +1,128 @@
+"""
+Check that the read endpoints run a fixed number of SQL statements.
+
+Every endpoint is called in-process (httpx over ASGI) against the database
+configured by the usual DB_* / DATABASE_URL settings, with the auth caches
+cleared so the worst case is measured. The run fails when an endpoint exceeds
+its query budget, or when a listing issues more queries for a full page than
+for a single row -- the signature of an N+1 (e.g. loading each doctor's
+specialization separately while serializing DoctorResponse).
+
+Usage (from backend/, after `alembic upgrade head`):
+    python -m benchmarks.query_budget
+
+Exits with status 1 on any violation, so it can gate CI.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date, timedelta
+
+import httpx
+from sqlalchemy import select
+
+from app.auth import UserType, create_access_token, principal_caches, token_cache
+from app.core.query_counter import QueryCounter
+from app.database import AsyncSessionLocal, async_engine
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.specialization import Specialization
+from app.utils.pagination import MAX_PAGE_SIZE
+from benchmarks.appointment_queries import seed
+from main import app
+
+# (path, auth, max queries, paged). Paths are formatted with doctor_id, patient_id,
+# specialization_id and the availability dates; auth is None, "doctor" or "patient".
+ENDPOINTS = [
+    ("/doctors/", None, 1, True),
+    ("/doctors/{doctor_id}", None, 1, False),
+    ("/doctors/me", UserType.DOCTOR, 1, False),
+    ("/patients/", UserType.PATIENT, 2, True),
+    ("/patients/{patient_id}", None, 1, False),
+    ("/patients/me", UserType.PATIENT, 1, False),
+    ("/specializations/", None, 1, True),
+    ("/specializations/{specialization_id}", None, 1, False),
+    ("/appointments/doctor/{doctor_id}", UserType.DOCTOR, 3, True),
+    ("/appointments/patient/{patient_id}", UserType.PATIENT, 3, True),
+    ("/appointments/availability?start_date={start}&end_date={end}", None, 2, True),
+]
+
+
+def clear_auth_caches() -> None:
+    token_cache.clear()
+    for cache in principal_caches.values():
+        cache.clear()
+
+
+async def count_queries(client: httpx.AsyncClient, url: str, headers: dict) -> QueryCounter:
+    clear_auth_caches()
+    with QueryCounter(async_engine.sync_engine) as queries:
+        response = await client.get(url, headers=headers)
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {url} returned {response.status_code}: {response.text[:200]}")
+    return queries
+
+
+async def run(verbose: bool) -> int:
+    async with AsyncSessionLocal() as db:
+        doctor_id = (await db.execute(select(Doctor.id).order_by(Doctor.id).limit(1))).scalar()
+        patient_id = (await db.execute(select(Patient.id).order_by(Patient.id).limit(1))).scalar()
+        specialization_id = (await db.execute(select(Specialization.id).order_by(Specialization.id).limit(1))).scalar()
+
+    tokens = {
+        UserType.DOCTOR: create_access_token({"sub": str(doctor_id), "user_type": UserType.DOCTOR}),
+        UserType.PATIENT: create_access_token({"sub": str(patient_id), "user_type": UserType.PATIENT}),
+    }
+    values = {
+        "doctor_id": doctor_id, "patient_id": patient_id, "specialization_id": specialization_id,
+        "start": date.today().isoformat(), "end": (date.today() + timedelta(days=6)).isoformat(),
+    }
+
+    failures = 0
+    print(f"{'endpoint':<64}{'queries':>8}{'budget':>8}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for path, auth, budget, paged in ENDPOINTS:
+            url = path.format(**values)
+            headers = {"Authorization": f"Bearer {tokens[auth]}"} if auth else {}
+            problems = []
+
+            if paged:
+                separator = "&" if "?" in url else "?"
+                single = await count_queries(client, f"{url}{separator}limit=1", headers)
+                queries = await count_queries(client, f"{url}{separator}limit={MAX_PAGE_SIZE}", headers)
+                if queries.count > single.count:
+                    problems.append(f"N+1: {single.count} queries for 1 row, {queries.count} for a full page")
+            else:
+                queries = await count_queries(client, url, headers)
+
+            if queries.count > budget:
+                problems.append(f"over budget ({queries.count} > {budget})")
+
+            print(f"{url:<64}{queries.count:>8}{budget:>8}  {'FAIL' if problems else 'ok'}")
+            for problem in problems:
+                print(f"    {problem}")
+            if problems or verbose:
+                for statement in queries.statements:
+                    print("    " + " ".join(statement.split())[:160])
+            failures += bool(problems)
+
+    print(f"\n{failures} endpoint(s) failed" if failures else "\nAll endpoints within budget")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=MAX_PAGE_SIZE, help="doctors to seed if missing")
+    parser.add_argument("--patients", type=int, default=MAX_PAGE_SIZE, help="patients to seed if missing")
+    parser.add_argument("--rows", type=int, default=2000, help="appointments to seed if missing")
+    parser.add_argument("--verbose", action="store_true", help="print the statements of every endpoint")
+    args = parser.parse_args()
+
+    # Listings need more rows than one page so a full page is really full
+    seed(args.rows, args.doctors, args.patients)
+    sys.exit(asyncio.run(run(args.verbose)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measure how long a worker takes to start.
+
+Each run starts a fresh interpreter (as uvicorn does for every worker), imports
+`main` and runs the app's startup (lifespan) hooks, timing both phases. Run it
+against the database configured by the usual DB_* / DATABASE_URL settings,
+after `python -m app.bootstrap`.
+
+Usage (from backend/):
+    python -m benchmarks.startup --runs 20
+    python -m benchmarks.startup --bootstrap   # also time the one-shot bootstrap
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+WORKER_SCRIPT = """
+import asyncio, json, time
+started = time.perf_counter()
+from main import app
+imported = time.perf_counter()
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print(json.dumps({"import": imported - started, "startup": ready - imported}))
+"""
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def time_worker() -> dict:
+    result = subprocess.run([sys.executable, "-c", WORKER_SCRIPT], capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f"Worker failed to start:\n{result.stderr.strip().splitlines()[-1]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["total"] = timings["import"] + timings["startup"]
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="worker starts to time")
+    parser.add_argument("--bootstrap", action="store_true", help="also time `python -m app.bootstrap`")
+    args = parser.parse_args()
+
+    if args.bootstrap:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "app.bootstrap"], check=True, capture_output=True)
+        print(f"bootstrap: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    time_worker()  # Warm the filesystem / bytecode caches
+    runs = [time_worker() for _ in range(args.runs)]
+
+    print(f"\n{'phase':<12}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for phase in ("import", "startup", "total"):
+        samples = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<12}{statistics.median(samples):>10.1f}{percentile(samples, 0.95):>10.1f}{max(samples):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,8 @@ while ! nc -z mysql 3306; do
   sleep 2
 done
 
-# Initialize database
-python -c "from app.database import Base, engine; Base.metadata.create_all(bind=engine)"
+# Migrate the schema and seed reference data (once, before the workers start)
+python -m app.bootstrap
 
 # Start FastAPI - CORRECTED COMMAND
 uvicorn main:app --host 0.0.0.0 --port 8000 --workers 4
\ No newline at end of file
@@ -1,30 +1,47 @@
-from fastapi import FastAPI, Depends
-from app.database import Base, engine  
-from app.routers import patient, doctor, specialization, appointment
+import logging
+from fastapi import FastAPI, Depends, Response
+from app.routers import patient, doctor, specialization, appointment, events
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.security import OAuth2PasswordBearer
 from app.auth import get_current_doctor, get_current_patient
 from app.schemas.doctor import DoctorResponse
 from app.schemas.patient import PatientResponse
-from app.populate_db.specializations_table import insert_specializations
+from app.core.health import health_status
+from app.core.logging_config import RequestContextMiddleware, setup_logging
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.replicas import ReadYourWritesMiddleware, replica_router
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.services.specialization_catalog import specialization_catalog
+from app.core.schema import check_schema_version
+from app.database import async_engine
+from contextlib import asynccontextmanager
 
 
+setup_logging()
+logger = logging.getLogger(__name__)
 
-# Creating tables before creating FastAPI app
-try:
-    Base.metadata.create_all(bind=engine)
-    print("All tables created successfully!")
-    insert_specializations()
 
-except Exception as e:
-    print(f"Error creating tables: {e}")
+# Tables are migrated and seeded once per deploy by `python -m app.bootstrap` (see entrypoint.sh);
+# workers only verify the schema version at startup.
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await check_schema_version(async_engine)
+    # Preload the specialization catalog; if the database isn't reachable yet it loads on first use
+    try:
+        await specialization_catalog.load()
+    except Exception as e:
+        logger.warning(f"Error preloading specializations: {e}")
+    await replica_router.start()
+    yield
+    await replica_router.stop()
 
 
 # creating FastAPI app instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 oauth2_doctor_scheme = OAuth2PasswordBearer(
     tokenUrl="/doctors/login",
@@ -100,15 +117,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "X-Request-ID"],
 )
+# Marks callers whose write succeeded, so their next reads skip the replicas
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(ProfilingMiddleware)
+# Outermost, so latency includes CORS handling and the full response body
+app.add_middleware(MetricsMiddleware)
+# Around everything else, so every log record of a request carries its id
+app.add_middleware(RequestContextMiddleware)
 
 
 app.include_router(patient.router)
 app.include_router(doctor.router)
 app.include_router(specialization.router)
 app.include_router(appointment.router)
+app.include_router(events.router)
 
 @app.get("/")
 def read_root():
     return {"details": "Welcome to healthcare fast api..."}
 
+
+@app.get("/health", include_in_schema=False)
+async def read_health(response: Response):
+    """Database, Redis (with its circuit breaker) and read replica status; 503 if the database is down."""
+    response.status_code, body = await health_status()
+    return body
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Prometheus metrics for this worker process."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
@@ -0,0 +1,57 @@
+"""Composite indexes for appointment lookups and one live appointment per doctor slot
+
+Adds the generated active_slot column (1 while an appointment is live, NULL once
+cancelled) and the indexes used by the availability / conflict checks in
+app/utils/helper.py.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fails if a doctor already has two live appointments in the same slot;
+    # cancel the duplicates before upgrading.
+    with op.batch_alter_table('appointments') as batch_op:
+        batch_op.add_column(sa.Column(
+            'active_slot',
+            sa.Integer(),
+            sa.Computed("CASE WHEN status <> 'CANCELLED' THEN 1 END", persisted=True),
+            nullable=True,
+        ))
+        batch_op.create_index(
+            'ix_appointments_doctor_schedule_status',
+            ['doctor_id', 'scheduled_datetime', 'status'],
+        )
+        batch_op.create_index(
+            'ix_appointments_patient_schedule_status',
+            ['patient_id', 'scheduled_datetime', 'status'],
+        )
+        batch_op.create_index(
+            'uq_appointments_doctor_active_slot',
+            ['doctor_id', 'scheduled_datetime', 'active_slot'],
+            unique=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('appointments') as batch_op:
+        batch_op.drop_index('uq_appointments_doctor_active_slot')
+        batch_op.drop_index('ix_appointments_patient_schedule_status')
+        batch_op.drop_index('ix_appointments_doctor_schedule_status')
+        batch_op.drop_column('active_slot')
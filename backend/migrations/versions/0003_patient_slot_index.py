@@ -0,0 +1,40 @@
+"""One live appointment per patient time slot
+
+Adds a unique index on (patient_id, scheduled_datetime, active_slot), the
+patient-side counterpart of uq_appointments_doctor_active_slot. Together they
+let BOOKING_LOCK_MODE=database rely on the database alone to reject double
+bookings.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fails if a patient already has two live appointments at the same time;
+    # cancel the duplicates before upgrading.
+    with op.batch_alter_table('appointments') as batch_op:
+        batch_op.create_index(
+            'uq_appointments_patient_active_slot',
+            ['patient_id', 'scheduled_datetime', 'active_slot'],
+            unique=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('appointments') as batch_op:
+        batch_op.drop_index('uq_appointments_patient_active_slot')
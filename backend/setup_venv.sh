@@ -12,12 +12,15 @@ pip install --upgrade pip
 # Install the required packages
 pip install 'fastapi[standard]'
 pip install 'uvicorn[standard]'
-pip install sqlalchemy
+pip install 'sqlalchemy[asyncio]'
 pip install pymysql
+pip install aiomysql aiosqlite
+pip install alembic
 pip install redis
 pip install 'passlib[bcrypt]'
 pip install python-jose[cryptography] fastapi-security
 pip install -U pydantic
+pip install prometheus-client
 
 
 echo "Virtual environment setup complete! Use 'source venv/bin/activate' to activate it."
@@ -157,8 +157,8 @@ async function handleLogin(event) {
         sessionStorage.setItem('userRole', userRole);
         await fetchCurrentUser(); // This will set currentUser and update UI
 
-        startDoctorsPolling();
-        sessionStorage.setItem('doctorsPollingActive', 'true');
+        startLiveUpdates();
+        sessionStorage.setItem('liveUpdatesActive', 'true');
 
     } catch (error) {
 
@@ -172,18 +172,52 @@ async function handleLogin(event) {
 
 // -----------------UPDATE INFORMATION REGULARLY AFTER LOGIN---------------
 
+let eventSource = null;
 let doctorsPollingInterval = null;
 
 
-function startDoctorsPolling() {
-    // Fetch immediately, then every 30 seconds
+// Server pushes booking, cancellation and directory changes; polling is only a fallback
+function startLiveUpdates() {
+    if (eventSource) eventSource.close();
     fetchAndUpdateDoctors();
-    doctorsPollingInterval = setInterval(fetchAndUpdateDoctors, 30000); // 30 seconds
+
+    eventSource = new EventSource(`${API_BASE_URL}/events/stream?token=${encodeURIComponent(token)}`);
+
+    eventSource.addEventListener('doctors.changed', fetchAndUpdateDoctors);
+
+    ['appointment.created', 'appointment.cancelled', 'appointment.completed'].forEach(type => {
+        eventSource.addEventListener(type, () => {
+            if (userRole === 'patient') fetchPatientAppointments();
+            else if (userRole === 'doctor') fetchDoctorAppointments();
+        });
+    });
+
+    ['slot.booked', 'slot.released'].forEach(type => {
+        eventSource.addEventListener(type, (event) => {
+            const slot = JSON.parse(event.data);
+            // Refresh the slot picker if it is showing the affected doctor and day
+            if (parseInt(apptDoctorSelect.value) === slot.doctor_id &&
+                apptDateInput.value === slot.scheduled_datetime.slice(0, 10)) {
+                handleApptDateChange();
+            }
+        });
+    });
+
+    eventSource.onerror = () => {
+        // EventSource reconnects by itself; only fall back to polling once it gives up
+        if (eventSource.readyState === EventSource.CLOSED && !doctorsPollingInterval) {
+            console.warn("Live updates unavailable, polling doctors every 30 seconds");
+            doctorsPollingInterval = setInterval(fetchAndUpdateDoctors, 30000);
+        }
+    };
 }
 
-function stopDoctorsPolling() {
+function stopLiveUpdates() {
+    if (eventSource) eventSource.close();
+    eventSource = null;
     if (doctorsPollingInterval) clearInterval(doctorsPollingInterval);
-    sessionStorage.removeItem('doctorsPollingActive');
+    doctorsPollingInterval = null;
+    sessionStorage.removeItem('liveUpdatesActive');
 }
 
 async function fetchAndUpdateDoctors() {
@@ -197,8 +231,8 @@ async function fetchAndUpdateDoctors() {
 
 // PERSIST THE DOCTORS LOADING
 window.addEventListener('load', () => {
-    if (sessionStorage.getItem('doctorsPollingActive') === 'true') {
-        startDoctorsPolling();
+    if (sessionStorage.getItem('liveUpdatesActive') === 'true') {
+        startLiveUpdates();
     }
 });
 
@@ -224,27 +258,48 @@ async function userLogin(loginObject) {
     }      
 }
 
-// Get all doctors (protected)
-async function getAllDoctors() {
-  try {
+// Pages served with an ETag, by URL, so polling can revalidate instead of re-downloading
+const etagPages = new Map();
 
-    const response = await fetch(`${API_BASE_URL}/doctors/`, {
-    method: "GET",
-    headers: {
+// Follow X-Next-Cursor until every page of a listing endpoint has been fetched
+async function fetchAllPages(path) {
+  const items = [];
+  let cursor = null;
+  do {
+    const separator = path.includes('?') ? '&' : '?';
+    const url = `${API_BASE_URL}${path}${separator}limit=200${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`;
+    const cached = etagPages.get(url);
+    const headers = {
       "Content-Type": "application/json",
       "Authorization": `Bearer ${token}`
-    }
+    };
+    if (cached) headers["If-None-Match"] = cached.etag;
 
-  });
+    const response = await fetch(url, { method: "GET", headers });
+
+    // Unchanged since the last poll: reuse the page we already have
+    if (response.status === 304 && cached) {
+      items.push(...cached.data);
+      cursor = cached.nextCursor;
+      continue;
+    }
 
     const responseData = await response.json();
 
     if (!response.ok) throw new Error(responseData.detail);
 
-    return responseData;
-  } catch (error) {
-      throw error;
-  }
+    items.push(...responseData);
+    cursor = response.headers.get('X-Next-Cursor');
+
+    const etag = response.headers.get('ETag');
+    if (etag) etagPages.set(url, { etag, data: responseData, nextCursor: cursor });
+  } while (cursor);
+  return items;
+}
+
+// Get all doctors (protected)
+async function getAllDoctors() {
+  return fetchAllPages('/doctors/');
 }
 
 async function getUserDetails() {
@@ -313,7 +368,7 @@ function logout() {
 
     sessionStorage.clear();
 
-    stopDoctorsPolling();
+    stopLiveUpdates();
     currentUser = null;
     userRole = "";
     token = "";
@@ -633,25 +688,7 @@ async function fetchPatientAppointments() {
 
 // get appiontments
 async function getMyAppointmets() {
-
-  try {
-    const response = await fetch(`${API_BASE_URL}/appointments/${userRole}/${currentUser.id}`, {
-    method: "GET",
-    headers: {
-      "Content-Type": "application/json",
-      "Authorization": `Bearer ${token}`
-    }
-  });
-
-    const responseData = await response.json();
-  
-    if (!response.ok) throw new Error(responseData.detail);
-
-    return responseData;
-
-  } catch (error) {
-      throw error;
-  }
+  return fetchAllPages(`/appointments/${userRole}/${currentUser.id}`);
 }
 
 async function bindAppts(appointments) {